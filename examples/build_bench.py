@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+"""
+time Deck.build() on a made up spec with lots of pages, once rendering on a
+single core and once on every core. The speedup is the single core wall
+time over the parallel one, best of --repeat builds each so that warming up
+(fonts, imports) doesn't count for either
+"""
+
+import os
+import asyncio
+import argparse
+import tempfile
+
+from PIL import Image
+
+from streamdeckui import Deck
+from streamdeckui.fake import FakeDevice
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+def make_spec(directory, args):
+    """
+    pages alternate between a background image and labelled color keys
+    """
+    lines = ['start: p0', 'pages:']
+
+    for p in range(args.pages):
+        lines.append(f"  p{p}:")
+
+        if p % 2 == 0:
+            background = f"bg{p}.png"
+            Image.new('RGB', (800, 600), (p * 7 % 256, 80, 160)).save(os.path.join(directory, background))
+            lines.append(f"    background: {background}")
+
+        lines.append("    keys:")
+        for k in range(FakeDevice.KEY_COUNT):
+            lines.append(f"      {k}: {{label: 'P{p} K{k}', color: '#{p * 7 % 256:02x}3060', link: p{(p + 1) % args.pages}}}")
+
+    path = os.path.join(directory, 'deck.yaml')
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines))
+
+    return path
+
+
+async def main(args):
+    directory = tempfile.mkdtemp()
+    spec = make_spec(directory, args)
+    loop = asyncio.get_event_loop()
+
+    device = FakeDevice()
+    deck = Deck(device, loop=loop)
+
+    async def best(workers, baseline=None):
+        # NOTE nothing carries over between builds without a bundle_dir,
+        # every build renders every image
+        reports = [
+            await deck.build(spec, workers=workers, baseline=baseline)
+            for _ in range(args.repeat)
+        ]
+        return min(reports, key=lambda report: report.wall)
+
+    serial = await best(1)
+    print(f"  1 workers: {serial}")
+
+    workers = args.workers or os.cpu_count()
+    report = await best(workers, serial)
+    print(f"{workers:>3} workers: {report}")
+
+    await deck.release()
+
+
+# NOTE the guard matters, worker processes import this file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', type=int, default=40)
+    parser.add_argument('--workers', type=int, default=None, help="default is every core")
+    parser.add_argument('--repeat', type=int, default=3, help="builds per worker count, the fastest counts")
+    args = parser.parse_args()
+
+    asyncio.get_event_loop().run_until_complete(main(args))
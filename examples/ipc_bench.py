@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+"""
+measure how fast other processes can push key images through Deck.serve()
+
+runs against a FakeDevice so no hardware is required
+"""
+
+import os
+import time
+import asyncio
+import argparse
+import tempfile
+
+from streamdeckui import Deck, Page, Key
+from streamdeckui.fake import FakeDevice
+from streamdeckui.ipc import IPCClient
+from streamdeckui.utils import solid_image
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+async def client(path, images, batches):
+    client = IPCClient(path)
+    await client.connect()
+
+    try:
+        for _ in range(batches):
+            await client.set_images(images)
+    finally:
+        await client.close()
+
+
+async def events(path, deck, presses):
+    client = IPCClient(path)
+    await client.connect()
+    await client.subscribe()
+
+    received = 0
+
+    async def consume():
+        nonlocal received
+        async for event in client.events():
+            received += 1
+
+    consumer = asyncio.ensure_future(consume())
+    start = time.perf_counter()
+
+    for i in range(presses):
+        key = i % deck._deck.key_count()
+        deck._deck.press(key, True)
+        deck._deck.press(key, False)
+        await asyncio.sleep(0)
+
+    # wait until events stop arriving, any missing were dropped by the server
+    while True:
+        seen = received
+        await asyncio.sleep(.1)
+        if seen == received:
+            break
+
+    elapsed = time.perf_counter() - start - .1
+    consumer.cancel()
+    await client.close()
+
+    return received, elapsed
+
+
+async def main(args):
+    deck = Deck(FakeDevice(), clear=False, loop=asyncio.get_event_loop())
+    deck.add_page('bench', Page(deck, None))
+    deck.change_page('bench')
+
+    colors = ['red', 'green', 'blue', 'white', 'black']
+    images = [
+        (i, Key.UP, bytes(solid_image(deck, colors[i % len(colors)])))
+        for i in range(deck._deck.key_count())
+    ]
+    batch_bytes = sum(len(image) for _, _, image in images)
+
+    path = os.path.join(tempfile.mkdtemp(), 'deck.sock')
+    server = await deck.serve(path)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        client(path, images, args.batches)
+        for _ in range(args.clients)
+    ])
+    elapsed = time.perf_counter() - start
+
+    batches = args.batches * args.clients
+    print(f"{args.clients} clients, {batches} batches of {len(images)} images in {elapsed:.3f}s")
+    print(f"  {batches / elapsed:.0f} batches/s")
+    print(f"  {server.images / elapsed:.0f} images/s")
+    print(f"  {batches * batch_bytes / elapsed / 1e6:.1f} MB/s of image data")
+    print(f"  {deck._deck.key_writes} device writes")
+
+    received, elapsed = await events(path, deck, args.presses)
+    print(f"{received} of {args.presses * 2} key events delivered in {elapsed:.3f}s")
+    print(f"  {received / elapsed:.0f} events/s")
+
+    await deck.release()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--batches', type=int, default=500)
+    parser.add_argument('--presses', type=int, default=1000)
+    args = parser.parse_args()
+
+    asyncio.get_event_loop().run_until_complete(main(args))
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+"""
+measure memory and gc overhead per Key when building lots of pages
+
+compares Key with LegacyKey, a copy of how keys were stored before they
+got __slots__ and the shared Deck.images store: a __dict__, a dict of
+rendered images per key and two blinker connections each
+
+runs against a FakeDevice so no hardware is required
+"""
+
+import gc
+import time
+import asyncio
+import weakref
+import pathlib
+import argparse
+import tracemalloc
+
+from streamdeckui import Deck, Page, Key
+from streamdeckui.fake import FakeDevice
+from streamdeckui.utils import ASSET_PATH, render_key_image, add_text, solid_image
+
+
+class LegacyKey:
+    """
+    just the storage side of the old Key, enough to measure it
+    """
+
+    def __init__(self, page, **kw):
+        self._page = weakref.ref(page)
+        self._images = {}
+        self._state = Key.UP
+
+        self.set_image(Key.UP, kw.get('up_image', solid_image(self.deck)))
+        self.set_image(Key.DOWN, kw.get('down_image', ASSET_PATH / 'pressed.png'))
+
+        label = kw.get('label', '')
+        if label:
+            self._images[Key.UP] = add_text(self.deck, self._images[Key.UP], label)
+
+        self.deck.key_up.connect(self.cb_key_up, sender=self)
+        self.deck.key_down.connect(self.cb_key_down, sender=self)
+
+    @property
+    def page(self):
+        return self._page()
+
+    @property
+    def deck(self):
+        return self.page.deck
+
+    def set_image(self, state, image):
+        if isinstance(image, pathlib.PurePath):
+            image = str(image)
+
+        self._images[state] = render_key_image(self.deck, image)
+
+    async def cb_key_up(self, *args, **kw):
+        pass
+
+    async def cb_key_down(self, *args, **kw):
+        pass
+
+
+def build(deck, key_class, pages, labels):
+    built = []
+
+    for p in range(pages):
+        page = Page(deck, [])
+        page._keys = [
+            key_class(page, label=f"{p}.{i}" if labels else '')
+            for i in range(deck._deck.key_count())
+        ]
+        built.append(page)
+
+    return built
+
+
+def measure(deck, key_class, args):
+    build(deck, key_class, 1, args.labels)  # warm up caches, imports, etc
+
+    gc.collect()
+    objects = len(gc.get_objects())
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+
+    pages = build(deck, key_class, args.pages, args.labels)
+
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+
+    keys = sum(len(page.keys) for page in pages)
+    tracked = len(gc.get_objects()) - objects
+
+    t = time.perf_counter()
+    gc.collect()
+    collect = time.perf_counter() - t
+
+    return {
+        'bytes/key': used / keys,
+        'gc objects/key': tracked / keys,
+        'gc.collect() ms': collect * 1000,
+    }, pages
+
+
+async def main(args):
+    loop = asyncio.get_event_loop()
+    deck = Deck(FakeDevice(), clear=False, loop=loop)
+
+    # NOTE keep the pages alive until both have been measured
+    before, kept = measure(deck, LegacyKey, args)
+    after, _ = measure(deck, Key, args)
+
+    keys = args.pages * deck._deck.key_count()
+    print(f"{args.pages} pages, {keys} keys, labels={args.labels}")
+    print(f"  {'':16} {'before':>10} {'after':>10}")
+
+    for name in before:
+        print(f"  {name:16} {before[name]:10.1f} {after[name]:10.1f}")
+
+    del kept
+    await deck.release()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--labels', action='store_true', help="give every key a unique label")
+    args = parser.parse_args()
+
+    asyncio.get_event_loop().run_until_complete(main(args))
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+"""
+replay a key trace recorded with Deck(..., record=path) against a
+FakeDevice and report how quickly key images were written back
+
+without a trace one is made up: bursts of fast presses with idle gaps
+"""
+
+import os
+import random
+import asyncio
+import argparse
+import tempfile
+
+from streamdeckui import Deck, Page
+from streamdeckui.fake import FakeDevice
+from streamdeckui.clock import VirtualClock
+from streamdeckui.trace import TraceRecorder, replay
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+def make_trace(path, args):
+    """
+    write a bursty trace in virtual time, takes no time at all
+    """
+    clock = VirtualClock()
+    recorder = TraceRecorder(path, clock, FakeDevice.KEY_COUNT)
+
+    random.seed(args.seed)
+
+    for _ in range(args.bursts):
+        clock.advance(random.uniform(.2, 1))
+
+        for _ in range(random.randint(5, args.burst)):
+            key = random.randrange(FakeDevice.KEY_COUNT)
+            recorder.record(key, True)
+            clock.advance(random.uniform(.005, .03))
+            recorder.record(key, False)
+            clock.advance(random.uniform(.005, .03))
+
+    recorder.close()
+
+
+async def main(args):
+    path = args.trace
+
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(), 'keys.trace')
+        make_trace(path, args)
+        print(f"made up a trace: {path} ({os.path.getsize(path)} bytes)")
+
+    loop = asyncio.get_event_loop()
+    device = FakeDevice()
+
+    # NOTE long dim/off times so the screen doesn't turn off mid replay
+    deck = Deck(device, loop=loop, dim_time=3600, off_time=3600)
+    deck.add_page('main', Page(deck, None))
+    deck.change_page('main')
+    await asyncio.sleep(0)
+
+    for speed in args.speed:
+        stats = await replay(deck, path, speed=speed or None, budget=args.budget / 1000)
+
+        label = f"{speed:g}x" if speed else "max"
+        print(f"{label:>5}: {stats}")
+        print(f"       {stats.writes} key images written, at most {stats.in_flight} events dispatching at once")
+
+    await deck.release()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('trace', nargs='?')
+    parser.add_argument('--speed', type=float, nargs='+', default=[1, 10, 0],
+        help="replay speeds, 0 is as fast as possible")
+    parser.add_argument('--budget', type=float, default=1000/60, help="ms before a key image is late")
+    parser.add_argument('--bursts', type=int, default=10)
+    parser.add_argument('--burst', type=int, default=30, help="most presses per burst")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    asyncio.get_event_loop().run_until_complete(main(args))
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+
+"""
+simulate hours of idle time and key presses in milliseconds by running a
+Deck on a FakeDevice and a VirtualClock
+"""
+
+import time
+import random
+import asyncio
+import argparse
+
+from streamdeckui import Deck, Page
+from streamdeckui.fake import FakeDevice
+from streamdeckui.clock import VirtualClock
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+async def main(args):
+    loop = asyncio.get_event_loop()
+    clock = VirtualClock(loop)
+    device = FakeDevice()
+
+    deck = Deck(device, loop=loop, clock=clock)
+    deck.add_page('main', Page(deck, None))
+    deck.change_page('main')
+    deck.turn_on()
+
+    # what the screen looked like when the user reached for it
+    seen = {'on': 0, 'dim': 0, 'off': 0}
+
+    random.seed(args.seed)
+    start = time.perf_counter()
+    end = args.hours * 3600
+    presses = 0
+
+    while clock.time() < end:
+        # mostly short gaps with the occasional long idle stretch
+        idle = random.expovariate(1 / args.idle)
+        await clock.run_for(idle)
+
+        level = device.brightness
+        seen['off' if not level else 'dim' if level < deck.brightness else 'on'] += 1
+
+        key = random.randrange(device.key_count())
+        device.press(key, True)
+        await clock.run_for(.1)
+        device.press(key, False)
+        await clock.run_for(.01)
+        presses += 1
+
+    elapsed = time.perf_counter() - start
+
+    print(f"simulated {args.hours}h with {presses} presses in {elapsed:.2f}s")
+    print(f"  {device.key_writes} key images written")
+    print(f"  brightness at each press: {seen}")
+
+    await deck.release()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--hours', type=float, default=8)
+    parser.add_argument('--idle', type=float, default=45, help="mean seconds between presses")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    asyncio.get_event_loop().run_until_complete(main(args))
@@ -50,7 +50,9 @@ setup(
         # 'blinker @ git+https://github.com/jek/blinker.git@b5e9f0629200d2b2f62e13e595b802948bb4fefb#egg=blinker',
     ],
 
-    extras_require = {},
+    extras_require = {
+        'yaml': ['pyyaml'], # yaml page definitions, see bundle.py
+    },
 
     include_package_data = True,
 
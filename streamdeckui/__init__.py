@@ -9,4 +9,7 @@ __copyright__    = 'Copyright 2021 Kurt Neufeld'
 from .deck import Deck
 from .page import Page
 from .key import Key
+from .virtual import VirtualPage
+from .touch import Dial, TouchRegion
 from .mixins import QuitKeyMixin, BackKeyMixin
+from .gestures import GestureKeyMixin
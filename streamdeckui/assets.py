@@ -0,0 +1,313 @@
+import os
+import sys
+import struct
+import weakref
+import pathlib
+import ctypes
+import ctypes.util
+
+from .periodic import Periodic
+from .tasks import log_exception
+from .utils import LABEL_FONT
+from .utils import render_key_image, add_text, resize_image, crop_image
+
+import logging
+logger = logging.getLogger(__name__)
+
+# how a key state's image was made, see AssetWatcher.track()
+FILE = 'file'  # Key.set_image(state, path)
+CROP = 'crop'  # Page.background(path)
+
+class Inotify:
+    """
+    just enough of inotify(7) through ctypes to watch a few directories
+    """
+
+    IN_MODIFY      = 0x002
+    IN_ATTRIB      = 0x004
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_TO    = 0x080
+    IN_CREATE      = 0x100
+
+    MASK  = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_ATTRIB
+    EVENT = struct.Struct('iIII')  # wd, mask, cookie, name length
+
+    def __init__(self):
+        if not sys.platform.startswith('linux'):
+            raise OSError("inotify is linux only")
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self._dirs = {}  # watch descriptor -> directory
+
+    def watch(self, directory):
+        if directory in self._dirs.values():
+            return
+
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), self.MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed: {directory}")
+
+        self._dirs[wd] = directory
+
+    def read(self):
+        """
+        return the set of paths that changed
+        """
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        paths = set()
+        offset = 0
+
+        while offset < len(data):
+            wd, mask, cookie, size = self.EVENT.unpack_from(data, offset)
+            offset += self.EVENT.size
+
+            name = data[offset:offset + size].rstrip(b'\0')
+            offset += size
+
+            if wd in self._dirs and name:
+                paths.add(os.path.join(self._dirs[wd], os.fsdecode(name)))
+
+        return paths
+
+    def close(self):
+        os.close(self.fd)
+
+
+class AssetWatcher:
+    """
+    re-render keys when the files they were made from change on disk
+
+    enable with Deck.watch_assets() before building pages. While enabled
+    Key.set_image(state, path), Page.background(path) and labels (which
+    depend on the label font) record what each key state was made from.
+    When one of those files changes only the affected states are rendered
+    again, in a worker thread, and only keys on the active page are sent
+    to the device.
+
+    uses inotify on linux and falls back to polling every `poll` seconds
+    """
+
+    poll = 1
+    settle = .1  # editors write files in bursts, wait for them to finish
+
+    def __init__(self, deck, poll=None):
+        self._deck = weakref.ref(deck)
+        self._loop = deck._loop
+        self.poll = poll or AssetWatcher.poll
+
+        # key -> {state: (kind, path, labels)}
+        self._recipes = weakref.WeakKeyDictionary()
+
+        self._files = {}    # absolute path -> set of paths as given to us
+        self._stamps = {}   # absolute path -> (size, mtime), for polling
+        self._changed = set()
+        self._handle = None
+
+        self._inotify = None
+        self._poller = None
+
+        self.watch(LABEL_FONT)
+
+    @property
+    def deck(self):
+        return self._deck()
+
+    def start(self):
+        try:
+            self._inotify = Inotify()
+        except (OSError, AttributeError) as e:
+            logger.debug("inotify unavailable, polling every %ss: %s", self.poll, e)
+        else:
+            for path in self._files:
+                self._inotify.watch(os.path.dirname(path))
+
+            self._loop.add_reader(self._inotify.fd, self._cb_inotify)
+            return
+
+        self._poller = Periodic(self.deck.clock, self.poll, self._cb_poll)
+        self._poller.start()
+
+    async def stop(self):
+        if self._inotify is not None:
+            self._loop.remove_reader(self._inotify.fd)
+            self._inotify.close()
+            self._inotify = None
+
+        if self._poller is not None:
+            await self._poller.stop()
+            self._poller = None
+
+        if self._handle is not None:
+            self._handle.cancel()
+
+    def watch(self, path):
+        path = str(path)
+        full = os.path.abspath(path)
+
+        if full not in self._files:
+            self._files[full] = set()
+            self._stamps[full] = stamp(full)
+
+            if self._inotify is not None:
+                self._inotify.watch(os.path.dirname(full))
+
+        self._files[full].add(path)
+
+    def track(self, key, state, image, kind=FILE):
+        """
+        remember how key's state image was made, or forget it if it wasn't
+        made from a file
+        """
+        states = self._recipes.setdefault(key, {})
+
+        if image is None:
+            # the default black key, only depends on the label font
+            states[state] = (kind, None, [])
+            return
+
+        if not isinstance(image, (str, pathlib.PurePath)):
+            states.pop(state, None)
+            return
+
+        states[state] = (kind, str(image), [])
+        self.watch(image)
+
+    def label(self, key, state, text):
+        recipe = self._recipes.get(key, {}).get(state)
+
+        if recipe is not None:
+            recipe[2].append(text)
+
+    def _cb_inotify(self):
+        self._touched(self._inotify.read())
+
+    def _cb_poll(self):
+        changed = set()
+
+        for full, old in self._stamps.items():
+            new = stamp(full)
+            if new != old:
+                self._stamps[full] = new
+                changed.add(full)
+
+        self._touched(changed)
+
+    def _touched(self, paths):
+        paths = {path for path in paths if path in self._files}
+        if not paths:
+            return
+
+        self._changed |= paths
+
+        if self._handle is not None:
+            self._handle.cancel()
+
+        self._handle = self.deck.clock.call_later(self.settle, self._cb_settled)
+
+    def _cb_settled(self):
+        self._handle = None
+
+        changed, self._changed = self._changed, set()
+        paths = set()
+
+        for full in changed:
+            paths |= self._files[full]
+
+        # NOTE not a page task, it must finish even if the page changes
+        task = self._loop.create_task(self.reload(paths))
+        task.add_done_callback(log_exception)
+
+    async def reload(self, paths):
+        """
+        re-render every key state that depends on one of paths
+        """
+        deck = self.deck
+        font = str(LABEL_FONT) in paths
+
+        for path in paths:
+            deck.images.forget(path)
+
+        # NOTE keyed on what's rendered, not on the key. Every key shares
+        # the default pressed.png, it only needs rendering once
+        jobs = []
+        recipes = {}
+
+        for key, states in list(self._recipes.items()):
+            for state, (kind, path, labels) in states.items():
+                if path in paths or (font and labels):
+                    recipe = (kind, path, tuple(labels), key.index if kind == CROP else None)
+                    recipes.setdefault(recipe, None)
+                    jobs.append((key, state, recipe))
+
+        if not jobs:
+            return
+
+        logger.debug(
+            "re-rendering %d key images (%d unique) for: %s",
+            len(jobs), len(recipes), ', '.join(paths)
+        )
+
+        images = await self._loop.run_in_executor(None, self._render, list(recipes))
+
+        for recipe, image in zip(list(recipes), images):
+            recipes[recipe] = None if image is None else deck.images.acquire(image)
+
+        for key, state, recipe in jobs:
+            image_id = recipes[recipe]
+            if image_id is None:
+                continue
+
+            key._replace(state, deck.images.incref(image_id))
+
+            if key.state == state:
+                key.show_image(state)  # only does anything on the active page
+
+        # the keys hold their own references now
+        for image_id in recipes.values():
+            deck.images.release(image_id)
+
+    def _render(self, recipes):
+        # NOTE we're in a worker thread
+        deck = self.deck
+        backgrounds = {}
+        images = []
+
+        for kind, path, labels, index in recipes:
+            try:
+                if kind == CROP:
+                    if path not in backgrounds:
+                        backgrounds[path] = resize_image(deck, deck.key_spacing, path)
+
+                    image = crop_image(deck._deck, backgrounds[path], deck.key_spacing, index)
+                else:
+                    image = render_key_image(deck, path)
+
+                for text in labels:
+                    image = add_text(deck, image, text)
+
+            except Exception as e:
+                # probably caught the file half written, the next event will fix it
+                logger.warning("could not re-render %s: %s", path, e)
+                image = None
+
+            images.append(image)
+
+        return images
+
+
+def stamp(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+
+    return st.st_size, st.st_mtime_ns
@@ -0,0 +1,271 @@
+"""
+render the pages of a bundle spec on every core at startup
+
+Deck.build(spec) collects every image the spec's pages need (icons, labels,
+background tiles), drops the duplicates and anything already in a previous
+bundle, then fans the rest out over a process pool. Workers hand their
+images back through shared memory. Pages are rendered and added in
+priority order, the start page first, then the pages it links to, so the
+start page is on the deck while the rest are still rendering.
+"""
+
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+from .bundle import Compiler, BundlePage
+from .bundle import bundle_path, previous_bundle, render_job
+from .ipc import attach_shm
+
+import logging
+logger = logging.getLogger(__name__)
+
+class DeviceFormat:
+    """
+    picklable stand-in for a device, rendering only needs its geometry
+    """
+
+    def __init__(self, device):
+        self._deck_type = device.deck_type()
+        self._key_count = device.key_count()
+        self._key_layout = device.key_layout()
+        self._key_image_format = device.key_image_format()
+
+    def deck_type(self):
+        return self._deck_type
+
+    def key_count(self):
+        return self._key_count
+
+    def key_layout(self):
+        return self._key_layout
+
+    def key_image_format(self):
+        return self._key_image_format
+
+
+class BuildReport:
+    def __init__(self, workers, baseline=None):
+        self.workers = workers
+        self.baseline = baseline  # report of a one worker build to compare with
+
+        self.jobs = 0        # images rendered
+        self.reused = 0      # images taken from a previous bundle
+        self.shared = 0      # images needed more than once, rendered once
+        self.render_cpu = 0  # seconds spent rendering, summed over workers
+        self.first_page = 0  # seconds until the start page was shown
+        self.wall = 0
+
+    @property
+    def speedup(self):
+        """
+        the baseline's wall time over ours, None without a baseline
+        """
+        if self.baseline is None or not self.wall:
+            return None
+
+        return self.baseline.wall / self.wall
+
+    def __str__(self):
+        text = (
+            f"{self.jobs} images rendered ({self.shared} deduplicated, "
+            f"{self.reused} reused) on {self.workers} workers in "
+            f"{self.wall:.2f}s, start page after {self.first_page:.2f}s, "
+            f"{self.render_cpu:.2f}s of rendering"
+        )
+
+        if self.speedup is not None:
+            text += f", speedup {self.speedup:.1f}x over {self.baseline.wall:.2f}s"
+
+        return text
+
+
+class Rendered:
+    """
+    quacks like a Bundle as far as BundlePage is concerned
+    """
+
+    def __init__(self, images):
+        self._images = images
+
+    def image(self, digest):
+        return memoryview(self._images[digest])
+
+
+# resized backgrounds, per worker process
+_backgrounds = {}
+
+def render_batch(device, jobs):
+    """
+    render [(digest, job)] and return (shm name, [(digest, offset, size)],
+    seconds). The caller owns, and must unlink, the shared memory
+
+    NOTE we're in a worker process
+    """
+    start = time.perf_counter()
+
+    images = [
+        (digest, bytes(render_job(device, job, _backgrounds)))
+        for digest, job in jobs
+    ]
+
+    shm = shared_memory.SharedMemory(
+        create=True,
+        size=max(1, sum(len(image) for _, image in images))
+    )
+
+    index = []
+    offset = 0
+
+    for digest, image in images:
+        shm.buf[offset:offset + len(image)] = image
+        index.append((digest, offset, len(image)))
+        offset += len(image)
+
+    name = shm.name
+    shm.close()
+
+    return name, index, time.perf_counter() - start
+
+def discard_batch(fut):
+    """
+    unlink the shared memory of a render_batch() that finished after the
+    build gave up on it
+    """
+    if fut.cancelled() or fut.exception() is not None:
+        return
+
+    shm = attach_shm(fut.result()[0])
+    shm.close()
+    shm.unlink()
+
+def page_order(start, pages):
+    """
+    start page, then breadth first through links, then everything else
+    """
+    order = [start]
+
+    for name in order:
+        for key in pages[name]:
+            link = key['link']
+            if link in pages and link not in order:
+                order.append(link)
+
+    order += [name for name in pages if name not in order]
+    return order
+
+def pool(workers):
+    if workers == 1:
+        # baseline, no processes to start. NOTE start cold like a fresh
+        # worker process would, or a second build gets the backgrounds free
+        _backgrounds.clear()
+        return ThreadPoolExecutor(1)
+
+    # NOTE don't fork, we have an event loop and threads
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+    return ProcessPoolExecutor(workers, mp_context=context)
+
+async def build(deck, spec_path, bundle_dir=None, workers=None, batch=4, baseline=None):
+    """
+    add the spec's pages to deck, rendering on `workers` processes (default
+    every core) in batches of `batch` images, and show the start page
+
+    with bundle_dir, images are reused from the bundle compiled there
+    and the result is written back for next time
+
+    baseline is the report of building the same spec with workers=1, the
+    report's speedup is measured against it
+
+    returns a BuildReport
+    """
+    start = time.perf_counter()
+    loop = deck._loop
+    device = deck._deck
+
+    path = bundle_path(bundle_dir, device) if bundle_dir else None
+    compiler = Compiler(spec_path, device, previous_bundle(path) if path else None)
+    pages = compiler.collect()
+    order = page_order(compiler.start, pages)
+
+    # every job goes to the first page, in priority order, that needs it
+    jobs = {name: [] for name in order}
+    owner = {}
+    uses = 0
+
+    for name in order:
+        for key in pages[name]:
+            for digest in (key['up'], key['down']):
+                if digest not in compiler.jobs:
+                    continue
+
+                uses += 1
+                if digest not in owner:
+                    owner[digest] = name
+                    jobs[name].append((digest, compiler.jobs[digest]))
+
+    workers = workers or os.cpu_count()
+
+    report = BuildReport(workers, baseline)
+    report.jobs = len(compiler.jobs)
+    report.reused = compiler.reused
+    report.shared = uses - len(compiler.jobs)
+
+    rendered = Rendered(compiler.images)
+    fmt = DeviceFormat(device)
+
+    executor = pool(workers)
+
+    # NOTE submitted in priority order, the pool works through them in that order
+    batches = {
+        name: [
+            loop.run_in_executor(executor, render_batch, fmt, jobs[name][i:i + batch])
+            for i in range(0, len(jobs[name]), batch)
+        ]
+        for name in order
+    }
+    unread = {fut for futures in batches.values() for fut in futures}
+
+    try:
+        for name in order:
+            for fut in batches[name]:
+                unread.discard(fut)
+                shm_name, index, seconds = await fut
+                report.render_cpu += seconds
+
+                shm = attach_shm(shm_name)
+                try:
+                    for digest, offset, size in index:
+                        compiler.images[digest] = bytes(shm.buf[offset:offset + size])
+                finally:
+                    shm.close()
+                    shm.unlink()
+
+            deck.add_page(name, BundlePage(deck, rendered, pages[name]))
+
+            if name == compiler.start:
+                deck.change_page(name)
+                report.first_page = time.perf_counter() - start
+
+    finally:
+        # NOTE only on errors, batches still running hand back shared memory
+        # nobody is going to read
+        for fut in unread:
+            fut.add_done_callback(discard_batch)
+
+        # don't block the loop waiting for the rest of the queue
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    compiler.rendered = report.jobs
+    report.wall = time.perf_counter() - start
+
+    if path is not None:
+        os.makedirs(path.parent, exist_ok=True)
+        compiler.assemble(pages).write(path)
+
+    logger.debug("built %s: %s", spec_path, report)
+
+    return report
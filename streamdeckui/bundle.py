@@ -0,0 +1,386 @@
+"""
+pages defined in a yaml/json file and compiled into a bundle of
+pre-rendered key images so that a Deck can start without rendering anything
+
+    start: main
+    pages:
+      main:
+        background: images/wallpaper.png
+        keys:
+          0: {label: Lights, icon: icons/bulb.png, link: lights}
+          14: {icon: icons/power.png, link: quit}
+      lights:
+        keys:
+          0: {label: Back, color: darkblue, link: back}
+
+paths are relative to the spec file. Key options are icon, label, color,
+down_icon and link, where link is a page name, 'back' or 'quit'.
+
+compile_bundle(spec, bundle_dir, device) writes one bundle per device model
+into bundle_dir and Deck.load_bundle(bundle_dir) picks the one matching the
+attached deck. Recompiling only renders keys whose definition or source
+images changed.
+"""
+
+import os
+import re
+import json
+import struct
+import hashlib
+import pathlib
+
+from .deck import Deck
+from .page import Page
+from .key import Key
+from .utils import ASSET_PATH
+from .utils import render_key_image, add_text, solid_image, resize_image, crop_image
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+import logging
+logger = logging.getLogger(__name__)
+
+MAGIC = b'SDUB'
+VERSION = 1
+HEADER = struct.Struct('>4sHI')  # magic, version, json header length
+
+LINK_BACK = 'back'
+LINK_QUIT = 'quit'
+
+# render jobs, plain tuples so they can be sent to other processes
+UP_JOB = 'up'      # (UP_JOB, background, icon, color, label, index)
+ICON_JOB = 'icon'  # (ICON_JOB, path)
+
+def load_spec(path):
+    path = pathlib.Path(path)
+
+    with open(path) as f:
+        if path.suffix in ('.yaml', '.yml'):
+            if yaml is None:
+                raise RuntimeError("yaml page definitions require: pip install pyyaml")
+
+            return yaml.safe_load(f)
+
+        return json.load(f)
+
+def bundle_path(bundle_dir, device):
+    model = re.sub(r'[^a-z0-9]+', '-', device.deck_type().lower()).strip('-')
+    return pathlib.Path(bundle_dir) / f"{model}.bundle"
+
+def file_stamp(path):
+    """
+    cheap change detection for a source asset
+    """
+    if path is None:
+        return None
+
+    st = os.stat(path)
+    return [str(path), st.st_size, st.st_mtime_ns]
+
+
+class Bundle:
+    """
+    a compiled bundle, header plus one blob of concatenated native images
+    """
+
+    def __init__(self, header, data):
+        self.header = header
+        self._data = memoryview(data)
+
+    @classmethod
+    def read(cls, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        magic, version, size = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"not a v{VERSION} streamdeckui bundle: {path}")
+
+        start = HEADER.size
+        header = json.loads(data[start:start + size])
+
+        return cls(header, memoryview(data)[start + size:])
+
+    def write(self, path):
+        header = json.dumps(self.header, separators=(',', ':')).encode()
+
+        tmp = f"{path}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(header)))
+            f.write(header)
+            f.write(self._data)
+
+        os.replace(tmp, path)
+
+    def image(self, digest):
+        offset, size = self.header['images'][digest]
+        return self._data[offset:offset + size]
+
+    @property
+    def start(self):
+        return self.header['start']
+
+    @property
+    def pages(self):
+        return self.header['pages']
+
+
+class Compiler:
+    """
+    turns a spec into a Bundle for a given device, reusing every image
+    from a previous bundle whose recipe hasn't changed
+    """
+
+    def __init__(self, spec_path, device, previous=None):
+        self.spec_path = pathlib.Path(spec_path)
+        self.base = self.spec_path.parent
+        self.spec = load_spec(spec_path)
+
+        self.device = device
+        self.format = device.key_image_format()
+        self.previous = previous
+
+        self.images = {}  # digest -> native image
+        self.jobs = {}    # digest -> job still to render, see collect()
+        self._backgrounds = {}
+
+        self.rendered = 0
+        self.reused = 0
+
+    def path(self, name):
+        if name is None:
+            return None
+
+        return self.base / name
+
+    def digest(self, recipe):
+        recipe = dict(recipe, format=self.format)
+        data = json.dumps(recipe, sort_keys=True, default=str).encode()
+        return hashlib.sha1(data).hexdigest()
+
+    @property
+    def start(self):
+        return self.spec.get('start') or next(iter(self.spec['pages']))
+
+    def compile(self):
+        pages = self.collect()
+
+        for digest, job in self.jobs.items():
+            self.images[digest] = render_job(self.device, job, self._backgrounds)
+            self.rendered += 1
+
+        return self.assemble(pages)
+
+    def collect(self):
+        """
+        work out every image the spec needs without rendering anything,
+        what's left to render ends up in self.jobs
+        """
+        self.jobs = {}
+        pages = {}
+
+        for name, page in self.spec['pages'].items():
+            keys = {
+                int(index): key
+                for index, key in (page.get('keys') or {}).items()
+            }
+
+            pages[name] = [
+                self.compile_key(page, index, keys.get(index, {}))
+                for index in range(self.device.key_count())
+            ]
+
+        # NOTE catch these now, at run time it's a KeyError on a key press
+        if self.start not in pages:
+            raise ValueError(f"{self.spec_path}: no such start page: {self.start}")
+
+        for name, keys in pages.items():
+            for index, key in enumerate(keys):
+                link = key['link']
+                if link is not None and link not in (LINK_BACK, LINK_QUIT) and link not in pages:
+                    raise ValueError(f"{self.spec_path}: {name} key {index} links to no such page: {link}")
+
+        return pages
+
+    def compile_key(self, page, index, key):
+        background = self.path(page.get('background'))
+        icon = self.path(key.get('icon'))
+
+        up = {
+            'icon': file_stamp(icon),
+            'label': key.get('label', ''),
+            'color': key.get('color', 'black'),
+            'background': None if icon else file_stamp(background),
+            'index': index,
+        }
+        if not up['background']:
+            del up['index']  # same image regardless of position
+
+        down_icon = self.path(key.get('down_icon')) or ASSET_PATH / 'pressed.png'
+        down = {'icon': file_stamp(down_icon)}
+
+        up_job = (
+            UP_JOB,
+            str(background) if up['background'] else None,
+            str(icon) if icon else None,
+            up['color'], up['label'], index
+        )
+
+        return {
+            'up': self.image(up, up_job),
+            'down': self.image(down, (ICON_JOB, str(down_icon))),
+            'link': key.get('link'),
+        }
+
+    def image(self, recipe, job):
+        digest = self.digest(recipe)
+
+        if digest in self.images or digest in self.jobs:
+            return digest
+
+        if self.previous and digest in self.previous.header['images']:
+            self.images[digest] = self.previous.image(digest)
+            self.reused += 1
+        else:
+            self.jobs[digest] = job
+
+        return digest
+
+    def assemble(self, pages):
+        blobs = []
+        index = {}
+        offset = 0
+
+        for digest, image in self.images.items():
+            index[digest] = [offset, len(image)]
+            blobs.append(bytes(image))
+            offset += len(image)
+
+        header = {
+            'model': self.device.deck_type(),
+            'format': self.format,
+            'start': self.start,
+            'pages': pages,
+            'images': index,
+        }
+
+        return Bundle(header, b''.join(blobs))
+
+
+def render_job(device, job, backgrounds):
+    """
+    render one image collected by Compiler.collect(), backgrounds caches
+    resized background images between calls
+    """
+    if job[0] == ICON_JOB:
+        return render_key_image(device, job[1])
+
+    _, background, icon, color, label, index = job
+
+    if icon is not None:
+        image = render_key_image(device, icon)
+    elif background is not None:
+        if background not in backgrounds:
+            backgrounds[background] = resize_image(device, Deck.key_spacing, background)
+
+        image = crop_image(device, backgrounds[background], Deck.key_spacing, index)
+    else:
+        image = solid_image(device, color)
+
+    if label:
+        image = add_text(device, image, label)
+
+    return image
+
+def previous_bundle(path):
+    if not path.exists():
+        return None
+
+    try:
+        return Bundle.read(path)
+    except ValueError as e:
+        logger.warning("ignoring old bundle: %s", e)
+
+    return None
+
+def compile_bundle(spec_path, bundle_dir, device):
+    """
+    compile spec_path for device (a StreamDeck device or FakeDevice with
+    the same geometry) into bundle_dir, returns the bundle path
+    """
+    path = bundle_path(bundle_dir, device)
+    os.makedirs(path.parent, exist_ok=True)
+
+    compiler = Compiler(spec_path, device, previous_bundle(path))
+    bundle = compiler.compile()
+    bundle.write(path)
+
+    logger.debug(
+        "compiled %s: %d images rendered, %d reused",
+        path, compiler.rendered, compiler.reused
+    )
+
+    return path
+
+
+class BundleKey(Key):
+    """
+    a key from a bundle, images are already rendered so all we do is
+    follow the link
+    """
+    __slots__ = ('link',)
+
+    def __init__(self, page, link=None, **kw):
+        self.link = link
+        super().__init__(page, **kw)
+
+    async def cb_key_up(self, *args, **kw):
+        self.state = Key.UP
+
+        if self.link is None:
+            return
+
+        if self.link == LINK_BACK:
+            self.deck.prev_page()
+        elif self.link == LINK_QUIT:
+            if not self.deck._quit_future.done():
+                self.deck._quit_future.set_result(None)
+        else:
+            self.deck.change_page(self.link)
+
+
+class BundlePage(Page):
+    def __init__(self, deck, bundle, keys):
+        super().__init__(deck, [])
+
+        self._keys = [
+            BundleKey(
+                self,
+                link=key['link'],
+                up_image=bundle.image(key['up']),
+                down_image=bundle.image(key['down']),
+            )
+            for key in keys
+        ]
+
+
+def load_bundle(deck, bundle_dir):
+    """
+    add the pages of the bundle matching deck's model and show the start page
+    """
+    path = bundle_path(bundle_dir, deck._deck)
+    bundle = Bundle.read(path)
+
+    if bundle.header['format'] != json.loads(json.dumps(deck._deck.key_image_format())):
+        raise ValueError(f"bundle {path} was compiled for a different key format")
+
+    pages = {}
+    for name, keys in bundle.pages.items():
+        pages[name] = BundlePage(deck, bundle, keys)
+        deck.add_page(name, pages[name])
+
+    deck.change_page(bundle.start)
+    return pages
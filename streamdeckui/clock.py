@@ -0,0 +1,144 @@
+import heapq
+import asyncio
+import itertools
+
+import logging
+logger = logging.getLogger(__name__)
+
+class LoopClock:
+    """
+    real time, all scheduling goes straight to the event loop
+
+    Deck, Timers, Periodic and TimerWheel only ever schedule through a
+    clock so that VirtualClock can be swapped in for testing
+    """
+
+    def __init__(self, loop=None):
+        self.loop = loop or asyncio.get_event_loop()
+
+    def time(self):
+        return self.loop.time()
+
+    def call_later(self, delay, callback, *args):
+        return self.loop.call_later(delay, callback, *args)
+
+    def call_at(self, when, callback, *args):
+        return self.loop.call_at(when, callback, *args)
+
+    async def sleep(self, delay):
+        await asyncio.sleep(delay)
+
+
+class VirtualHandle:
+    __slots__ = ('when', 'callback', 'args', 'cancelled')
+
+    def __init__(self, when, callback, args):
+        self.when      = when
+        self.callback  = callback
+        self.args      = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class VirtualClock:
+    """
+    time only moves when told to, so hours of dim/off timers and periodic
+    refreshes can be simulated in milliseconds
+
+    clock = VirtualClock(loop)
+    deck = Deck(FakeDevice(), loop=loop, clock=clock)
+    await clock.run_for(3600)   # an hour later...
+    """
+
+    settle_steps = 10  # loop iterations to let woken coroutines reschedule
+
+    def __init__(self, loop=None, start=0.0):
+        self.loop = loop or asyncio.get_event_loop()
+
+        self._now = start
+        self._timers = []  # heap of (when, seq, handle)
+        self._seq = itertools.count()
+
+    def time(self):
+        return self._now
+
+    def call_later(self, delay, callback, *args):
+        return self.call_at(self._now + delay, callback, *args)
+
+    def call_at(self, when, callback, *args):
+        handle = VirtualHandle(max(when, self._now), callback, args)
+        heapq.heappush(self._timers, (handle.when, next(self._seq), handle))
+        return handle
+
+    async def sleep(self, delay):
+        fut = self.loop.create_future()
+        handle = self.call_later(delay, _wake, fut)
+
+        try:
+            await fut
+        finally:
+            handle.cancel()
+
+    def advance(self, seconds):
+        """
+        move time forward, synchronously running every callback that comes
+        due in order. Coroutines woken by sleep() only run once the loop
+        gets control back, see run_for()
+        """
+        end = self._now + seconds
+
+        while self._run_next(end):
+            pass
+
+        self._now = end
+
+    async def run_for(self, seconds):
+        """
+        like advance() but let the loop run after every timer, so coroutines
+        sleeping on this clock get to reschedule themselves
+        """
+        end = self._now + seconds
+
+        await self._settle()
+        while self._run_next(end):
+            await self._settle()
+
+        self._now = end
+        await self._settle()
+
+    def _run_next(self, end):
+        while self._timers and self._timers[0][2].cancelled:
+            heapq.heappop(self._timers)
+
+        if not self._timers or self._timers[0][0] > end:
+            return False
+
+        when, _, handle = heapq.heappop(self._timers)
+        self._now = when
+
+        try:
+            handle.callback(*handle.args)
+        except Exception as e:
+            logger.exception(e)
+
+        return True
+
+    async def _settle(self):
+        for _ in range(self.settle_steps):
+            await asyncio.sleep(0)
+
+
+def _wake(fut):
+    if not fut.done():
+        fut.set_result(None)
+
+def as_clock(clock_or_loop):
+    """
+    accept either a clock or an event loop (or None for the current loop)
+    """
+    if isinstance(clock_or_loop, (LoopClock, VirtualClock)):
+        return clock_or_loop
+
+    return LoopClock(clock_or_loop)
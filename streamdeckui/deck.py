@@ -5,6 +5,10 @@ import blinker
 from .reify import reify
 from .periodic import Periodic
 from .timers import Timers
+from .watchdog import Watchdog
+from .wheel import TimerWheel
+from .images import ImageStore
+from .clock import as_clock
 
 import logging
 logger = logging.getLogger(__name__)
@@ -15,6 +19,9 @@ class Deck:
     def __init__(self, deck, keys=None, clear=True, loop=None, **kw):
         self._loop = loop or asyncio.get_event_loop()
 
+        # all timing goes through this, pass clock=VirtualClock() to fast forward
+        self.clock = as_clock(kw.get('clock') or self._loop)
+
         self._deck = deck
         self._brightness = .4
         self._clear = clear
@@ -25,19 +32,45 @@ class Deck:
         self.page_in  = blinker.signal('page_in')   # called when putting page in foreground
         self.page_out = blinker.signal('page_out')  # called when about to be put in background
 
+        self.images = ImageStore(self) # every key image, shared between keys
+
         self._pages = {}
         self._page_history = [] # track page navigation on a stack
 
         self._deck.set_key_callback(self.cb_keypress)
 
-        self._timers = Timers(self, loop, **kw)
+        # Stream Deck + has dials and a touchscreen
+        if hasattr(self._deck, 'set_dial_callback'):
+            self._deck.set_dial_callback(self.cb_dial)
+            self._deck.set_touchscreen_callback(self.cb_touchscreen)
+
+        self._timers = Timers(self, **kw)
+
+        # shared by all keys for gesture timing (long press, double tap, etc)
+        self.timer_wheel = TimerWheel(self.clock, kw.get('gesture_resolution'))
 
         self._futures = []
-        self._check_futures = Periodic(self._loop, 3, self.cb_check_futures)
+        self._check_futures = Periodic(self.clock, 3, self.cb_check_futures)
         self._check_futures.start()
 
         self._quit_future = asyncio.Future(loop=loop)
 
+        self._ipc = None
+        self._assets = None
+        self._reader = None
+
+        # optional, pass record=<path> to save every key event, see trace.replay()
+        self._recorder = None
+        if kw.get('record'):
+            from .trace import TraceRecorder
+            self._recorder = TraceRecorder(kw['record'], self.clock, deck.key_count())
+
+        # optional, pass watchdog=<seconds> to log loop stalls longer than that
+        self._watchdog = None
+        if kw.get('watchdog'):
+            self._watchdog = Watchdog(self._loop, kw['watchdog'])
+            self._watchdog.start()
+
         self._deck.reset()
 
     @reify
@@ -55,6 +88,42 @@ class Deck:
 
         await self._quit_future
 
+    def watch_assets(self, poll=None):
+        """
+        re-render keys when the image files they came from change, call
+        before building pages. See assets.AssetWatcher
+        """
+        from .assets import AssetWatcher
+
+        self._assets = AssetWatcher(self, poll)
+        self._assets.start()
+
+        return self._assets
+
+    def start_input(self, mode='transport', fd=None):
+        """
+        read key presses ourselves instead of through the StreamDeck
+        library's polling thread, see reader.InputReader
+        """
+        from .reader import InputReader
+
+        self._reader = InputReader(self, mode, fd)
+        self._reader.start()
+
+        return self._reader
+
+    async def serve(self, path, **kw):
+        """
+        let other processes update keys, change pages, etc. over a unix
+        socket at path, see ipc.IPCClient
+        """
+        from .ipc import IPCServer
+
+        self._ipc = IPCServer(self, path, **kw)
+        await self._ipc.start()
+
+        return self._ipc
+
     async def release(self, *args):
         """
         call at least once on exiting
@@ -65,6 +134,13 @@ class Deck:
         if self._deck is None:
             return
 
+        if self._reader:
+            # NOTE don't hand reading back to the library, we're closing the device
+            self._reader.stop(restore=False)
+
+        for page in self._pages.values():
+            page.tasks.cancel()
+
         with self._deck:
             if self._clear:
                 self.turn_off()
@@ -73,6 +149,19 @@ class Deck:
             self._deck.close()
 
         await self._check_futures.stop()
+
+        if self._ipc:
+            await self._ipc.stop()
+
+        if self._assets:
+            await self._assets.stop()
+
+        if self._watchdog:
+            self._watchdog.stop()
+
+        if self._recorder:
+            self._recorder.close()
+
         self._deck = None
 
     def __enter__(self):
@@ -123,9 +212,30 @@ class Deck:
         logger.debug("adding page: %s: %s", name, page)
         self._pages[name] = page
 
+    def load_bundle(self, bundle_dir):
+        """
+        add the pre-rendered pages compiled by bundle.compile_bundle() for
+        this deck's model and show the start page
+        """
+        from .bundle import load_bundle
+        return load_bundle(self, bundle_dir)
+
+    async def build(self, spec_path, bundle_dir=None, **kw):
+        """
+        add the pages of a bundle spec, rendering them on every core, and
+        show the start page as soon as it's ready. See build.build()
+        """
+        from .build import build
+        return await build(self, spec_path, bundle_dir, **kw)
+
     def change_page(self, name):
         logger.debug("change to page: %s", name)
 
+        # NOTE check before touching the history, a bad name left on top
+        # of it breaks self.page for good
+        if name not in self._pages:
+            raise KeyError(f"no such page: {name}")
+
         self.page_out.send_async(self.page)
         self._page_history.append(name)
         self.page_in.send_async(self.page)
@@ -151,22 +261,63 @@ class Deck:
     async def cb_keypress_async(self, device, key, pressed):
         # NOTE now we're in the main thread
 
-        key = self.page.keys[key]
+        page = self.page
+        key = page.keys[key]
         # logger.debug(f"cb_keypress_async: {key} {pressed}")
 
+        results = page.dispatch(key, pressed)
+
         if pressed:
-            return self.key_down.send_async(key)
+            return results + list(self.key_down.send_async(key))
         else:
-            return self.key_up.send_async(key)
+            return results + list(self.key_up.send_async(key))
 
     def cb_keypress(self, device, key, state):
         # NOTE we're in the streamdeck worker thread, not main
+        if self._recorder:
+            self._recorder.record(key, state)
+
         fut = asyncio.run_coroutine_threadsafe(
             self.cb_keypress_async(device, key, state),
             self._loop
         )
         self._futures.append(fut)
 
+    async def cb_dial_async(self, device, dial, event, value):
+        page = self.page
+        return page.dispatch_dial(page.dials[dial], event, value)
+
+    def cb_dial(self, device, dial, event, value):
+        # NOTE we're in the streamdeck worker thread, not main
+        fut = asyncio.run_coroutine_threadsafe(
+            self.cb_dial_async(device, dial, event, value),
+            self._loop
+        )
+        self._futures.append(fut)
+
+    async def cb_touchscreen_async(self, device, event, value):
+        return self.page.dispatch_touch(event, value)
+
+    def cb_touchscreen(self, device, event, value):
+        # NOTE we're in the streamdeck worker thread, not main
+        fut = asyncio.run_coroutine_threadsafe(
+            self.cb_touchscreen_async(device, event, value),
+            self._loop
+        )
+        self._futures.append(fut)
+
+    def dispatch_keypress(self, device, key, state):
+        """
+        cb_keypress for callers already in the main thread, eg. InputReader
+        """
+        if self._recorder:
+            self._recorder.record(key, state)
+
+        task = self._loop.create_task(
+            self.cb_keypress_async(device, key, state)
+        )
+        self._futures.append(task)
+
     async def cb_check_futures(self):
         """
         check every few seconds that the futures scheduled from the
@@ -0,0 +1,245 @@
+import asyncio
+import threading
+
+try:
+    from StreamDeck.Devices.StreamDeck import ControlType, DialEventType, TouchscreenEventType
+except ImportError:
+    ControlType = DialEventType = TouchscreenEventType = None
+
+import logging
+logger = logging.getLogger(__name__)
+
+class FakeDevice:
+    """
+    stands in for a StreamDeck.Devices.StreamDeck, no hardware required
+
+    everything that would have been sent to the hardware is recorded so
+    that tests and benchmarks can look at it. Use press() to simulate the
+    user pushing a key. Geometry matches a 15 key Stream Deck MK.2
+    """
+
+    KEY_COUNT = 15
+    KEY_COLS = 5
+    KEY_ROWS = 3
+
+    KEY_PIXEL_WIDTH = 72
+    KEY_PIXEL_HEIGHT = 72
+    KEY_IMAGE_FORMAT = 'JPEG'
+    KEY_FLIP = (True, True)
+    KEY_ROTATION = 0
+
+    DECK_TYPE = 'Fake Stream Deck'
+    VENDOR_ID = 0x0fd9
+    PRODUCT_ID = 0xffff
+
+    def __init__(self, serial='FAKE0001'):
+        self._serial = serial
+
+        self.update_lock = threading.RLock()
+        self.key_callback = None
+        self.last_key_states = [False] * self.KEY_COUNT
+
+        self.images = {}      # key index -> last image sent
+        self.key_writes = 0   # total set_key_image() calls
+        self.brightness = None
+        self.is_open = True
+
+    def __enter__(self):
+        self.update_lock.acquire()
+
+    def __exit__(self, type, value, traceback):
+        self.update_lock.release()
+
+    def open(self):
+        self.is_open = True
+
+    def close(self):
+        self.is_open = False
+
+    def reset(self):
+        self.images = {}
+
+    def deck_type(self):
+        return self.DECK_TYPE
+
+    def vendor_id(self):
+        return self.VENDOR_ID
+
+    def product_id(self):
+        return self.PRODUCT_ID
+
+    def get_serial_number(self):
+        return self._serial
+
+    def key_count(self):
+        return self.KEY_COUNT
+
+    def key_layout(self):
+        return self.KEY_ROWS, self.KEY_COLS
+
+    def key_image_format(self):
+        return {
+            'size': (self.KEY_PIXEL_WIDTH, self.KEY_PIXEL_HEIGHT),
+            'format': self.KEY_IMAGE_FORMAT,
+            'flip': self.KEY_FLIP,
+            'rotation': self.KEY_ROTATION,
+        }
+
+    def set_brightness(self, percent):
+        self.brightness = percent
+
+    def set_key_image(self, key, image):
+        self.key_writes += 1
+        self.images[key] = bytes(image) if image is not None else None
+
+    def set_key_callback(self, callback):
+        self.key_callback = callback
+
+    def set_key_callback_async(self, async_callback, loop=None):
+        loop = loop or asyncio.get_event_loop()
+
+        def callback(*args):
+            asyncio.run_coroutine_threadsafe(async_callback(*args), loop)
+
+        self.set_key_callback(callback if async_callback else None)
+
+    @classmethod
+    def key_report(cls, states):
+        """
+        the raw input report for the given key states, what a reader would
+        get from the device. See reader.InputReader
+        """
+        return bytes([0x01, 0, cls.KEY_COUNT, 0]) + bytes(map(bool, states))
+
+    def _read_control_states(self):
+        # same report layout as a Stream Deck MK.2
+        states = self.device.read(4 + self.KEY_COUNT)
+        if states is None:
+            return None
+
+        states = [bool(s) for s in states[4:]]
+
+        if ControlType is None:
+            return states  # pre-0.9.4 _read_key_states()
+
+        return {ControlType.KEY: states}
+
+    _read_key_states = _read_control_states
+
+    def press(self, key, pressed=True):
+        """
+        simulate a key changing state, just like the device's reader
+        thread would report it
+        """
+        if self.last_key_states[key] == pressed:
+            return
+
+        self.last_key_states[key] = pressed
+
+        if self.key_callback is not None:
+            self.key_callback(self, key, pressed)
+
+
+class FakePlusDevice(FakeDevice):
+    """
+    a Stream Deck + with 8 keys, 4 dials and an 800x100 touchscreen
+
+    every set_touchscreen_image() is recorded in touch_rects as
+    (x, y, width, height) so tests can check that only the part of the
+    screen that changed was sent. Use turn(), push() and touch() to
+    simulate the user
+    """
+
+    KEY_COUNT = 8
+    KEY_COLS = 4
+    KEY_ROWS = 2
+
+    KEY_PIXEL_WIDTH = 120
+    KEY_PIXEL_HEIGHT = 120
+    KEY_FLIP = (False, False)
+
+    DIAL_COUNT = 4
+
+    TOUCHSCREEN_PIXEL_WIDTH = 800
+    TOUCHSCREEN_PIXEL_HEIGHT = 100
+    TOUCHSCREEN_IMAGE_FORMAT = 'JPEG'
+    TOUCHSCREEN_FLIP = (False, False)
+    TOUCHSCREEN_ROTATION = 0
+
+    DECK_TYPE = 'Fake Stream Deck +'
+    PRODUCT_ID = 0xfffe
+
+    def __init__(self, serial='FAKE0002'):
+        super().__init__(serial)
+
+        self.dial_callback = None
+        self.touchscreen_callback = None
+        self.last_dial_states = [False] * self.DIAL_COUNT
+
+        self.touch_rects = []   # (x, y, width, height) of every write
+        self.touch_images = []  # and the image that was sent
+
+    def reset(self):
+        super().reset()
+        self.touch_rects = []
+        self.touch_images = []
+
+    def dial_count(self):
+        return self.DIAL_COUNT
+
+    def is_touch(self):
+        return True
+
+    def touchscreen_image_format(self):
+        return {
+            'size': (self.TOUCHSCREEN_PIXEL_WIDTH, self.TOUCHSCREEN_PIXEL_HEIGHT),
+            'format': self.TOUCHSCREEN_IMAGE_FORMAT,
+            'flip': self.TOUCHSCREEN_FLIP,
+            'rotation': self.TOUCHSCREEN_ROTATION,
+        }
+
+    def set_touchscreen_image(self, image, x_pos=0, y_pos=0, width=0, height=0):
+        if not image:
+            x_pos, y_pos = 0, 0
+            width, height = self.TOUCHSCREEN_PIXEL_WIDTH, self.TOUCHSCREEN_PIXEL_HEIGHT
+
+        if not (0 <= x_pos and 0 < width and x_pos + width <= self.TOUCHSCREEN_PIXEL_WIDTH):
+            raise IndexError(f"invalid touchscreen x/width: {x_pos} {width}")
+
+        if not (0 <= y_pos and 0 < height and y_pos + height <= self.TOUCHSCREEN_PIXEL_HEIGHT):
+            raise IndexError(f"invalid touchscreen y/height: {y_pos} {height}")
+
+        self.touch_rects.append((x_pos, y_pos, width, height))
+        self.touch_images.append(bytes(image) if image else None)
+
+    def set_dial_callback(self, callback):
+        self.dial_callback = callback
+
+    def set_touchscreen_callback(self, callback):
+        self.touchscreen_callback = callback
+
+    def turn(self, dial, amount):
+        if self.dial_callback is not None:
+            self.dial_callback(self, dial, DialEventType.TURN, amount)
+
+    def push(self, dial, pressed=True):
+        if self.last_dial_states[dial] == pressed:
+            return
+
+        self.last_dial_states[dial] = pressed
+
+        if self.dial_callback is not None:
+            self.dial_callback(self, dial, DialEventType.PUSH, pressed)
+
+    def touch(self, x, y, event=None, x_out=None, y_out=None):
+        """
+        a short touch by default, pass x_out/y_out for a drag
+        """
+        value = {'x': x, 'y': y}
+
+        if x_out is not None:
+            value.update(x_out=x_out, y_out=y_out)
+            event = event or TouchscreenEventType.DRAG
+
+        if self.touchscreen_callback is not None:
+            self.touchscreen_callback(self, event or TouchscreenEventType.SHORT, value)
@@ -0,0 +1,164 @@
+from .tasks import log_exception
+
+import logging
+logger = logging.getLogger(__name__)
+
+# GestureState.flags
+HELD = 1  # key is down
+LONG = 2  # long press fired during this hold
+TAP  = 4  # released, waiting to see if a second tap follows
+
+class GestureState:
+    """
+    per key gesture bookkeeping, kept small since every key gets one
+    """
+    __slots__ = ('flags', 'taps', 'timer')
+
+    def __init__(self):
+        self.flags = 0
+        self.taps  = 0
+        self.timer = None
+
+    def cancel(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+
+class GestureKeyMixin:
+    """
+    turn raw key up/down events into gestures. Override any of:
+
+    cb_press:       a short press (fired on release, or after double_tap_time
+                    when double taps are enabled)
+    cb_double_tap:  two short presses within double_tap_time
+    cb_long_press:  key held for long_press_time
+    cb_repeat:      fired every repeat_time while the key is still held
+                    after a long press
+    cb_release:     key released after a long press
+
+    all timing uses the deck's shared TimerWheel so a gesture fires at most
+    one wheel tick late, see Deck(gesture_resolution=.01)
+
+    gesture callbacks aren't cancelled when the page goes into the
+    background, start long running work with self.spawn() so it is. Any
+    gesture in progress is dropped though, the release goes to whichever
+    key is at our index on the new page
+
+    class QuitKey(GestureKeyMixin, QuitKeyMixin, Key):
+        async def cb_long_press(self):
+            ...
+    """
+
+    long_press_time = .5
+    double_tap_time = .25  # 0 disables double taps, cb_press fires on release
+    repeat_time     = .1   # 0 disables repeat
+
+    def __init__(self, *args, **kw):
+        super().__init__(*args, **kw)
+        self._gesture = GestureState()
+
+    async def cb_press(self):
+        pass
+
+    async def cb_double_tap(self):
+        pass
+
+    async def cb_long_press(self):
+        pass
+
+    async def cb_repeat(self):
+        pass
+
+    async def cb_release(self):
+        pass
+
+    async def cb_key_down(self, *args, **kw):
+        await super().cb_key_down(*args, **kw)
+
+        g = self._gesture
+        g.cancel()
+
+        if g.flags & TAP:
+            g.taps += 1
+        else:
+            g.taps = 1
+
+        g.flags = HELD
+
+        if self.long_press_time:
+            g.timer = self.deck.timer_wheel.call_later(
+                self.long_press_time, self._gesture_long_press
+            )
+
+    async def cb_key_up(self, *args, **kw):
+        await super().cb_key_up(*args, **kw)
+
+        g = self._gesture
+        if not g.flags & HELD:
+            return  # pressed on another page, see page_out()
+
+        g.cancel()
+
+        if g.flags & LONG:
+            g.flags = 0
+            self._gesture_fire(self.cb_release)
+
+        elif g.taps >= 2:
+            g.flags = 0
+            self._gesture_fire(self.cb_double_tap)
+
+        elif self.double_tap_time:
+            g.flags = TAP
+            g.timer = self.deck.timer_wheel.call_later(
+                self.double_tap_time, self._gesture_tap
+            )
+
+        else:
+            g.flags = 0
+            self._gesture_fire(self.cb_press)
+
+    def page_out(self):
+        # NOTE we won't see the release, stop repeating and forget the taps.
+        # A tap that was only waiting for a second one still counts
+        super().page_out()
+
+        g = self._gesture
+        g.cancel()
+
+        if g.flags & TAP:
+            self._gesture_fire(self.cb_press)
+
+        g.flags = 0
+        g.taps = 0
+
+    def _gesture_tap(self):
+        g = self._gesture
+        g.flags = 0
+        g.timer = None
+        self._gesture_fire(self.cb_press)
+
+    def _gesture_long_press(self):
+        g = self._gesture
+        g.flags |= LONG
+        g.timer = None
+        self._gesture_fire(self.cb_long_press)
+
+        if self.repeat_time:
+            g.timer = self.deck.timer_wheel.call_later(
+                self.repeat_time, self._gesture_repeat
+            )
+
+    def _gesture_repeat(self):
+        g = self._gesture
+        g.timer = self.deck.timer_wheel.call_later(
+            self.repeat_time, self._gesture_repeat
+        )
+        self._gesture_fire(self.cb_repeat)
+
+    def _gesture_fire(self, cb):
+        # NOTE not a page task, like cb_key_up/down (see Page.dispatch). A
+        # gesture that changes page would otherwise be cancelled by its own
+        # page_out. Use self.spawn() for work that should stop with the page
+        task = self.deck._loop.create_task(cb())
+        task.add_done_callback(log_exception)
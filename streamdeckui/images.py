@@ -0,0 +1,130 @@
+import os
+import weakref
+import hashlib
+import pathlib
+
+from .utils import render_key_image
+
+import logging
+logger = logging.getLogger(__name__)
+
+class ImageStore:
+    """
+    every rendered key image lives here once, keys only hold an integer id
+
+    identical images (the default pressed.png, a black key, the same icon
+    on many pages) are stored once and reference counted, ids are reused
+    after the last reference is released
+    """
+
+    def __init__(self, deck):
+        self._deck = weakref.ref(deck)
+
+        self._images  = []  # id -> native image
+        self._refs    = []  # id -> refcount
+        self._ids     = {}  # content digest -> id
+        self._digests = []  # id -> content digest
+        self._free    = []
+
+        self._sources = {}  # source path -> (file stamp, id), render cache
+
+    def __len__(self):
+        return len(self._images) - len(self._free)
+
+    @property
+    def deck(self):
+        return self._deck()
+
+    def __getitem__(self, image_id):
+        return self._images[image_id]
+
+    def acquire(self, image):
+        """
+        add a native image (or take another reference to an identical one)
+        and return its id
+        """
+        digest = hashlib.blake2b(image, digest_size=16).digest()
+        image_id = self._ids.get(digest)
+
+        if image_id is not None:
+            self._refs[image_id] += 1
+            return image_id
+
+        if self._free:
+            image_id = self._free.pop()
+            self._images[image_id] = image
+            self._refs[image_id] = 1
+            self._digests[image_id] = digest
+        else:
+            image_id = len(self._images)
+            self._images.append(image)
+            self._refs.append(1)
+            self._digests.append(digest)
+
+        self._ids[digest] = image_id
+        return image_id
+
+    def incref(self, image_id):
+        self._refs[image_id] += 1
+        return image_id
+
+    def release(self, image_id):
+        if image_id is None:
+            return
+
+        self._refs[image_id] -= 1
+        if self._refs[image_id]:
+            return
+
+        del self._ids[self._digests[image_id]]
+        self._images[image_id] = None
+        self._digests[image_id] = None
+        self._free.append(image_id)
+
+    def render(self, image):
+        """
+        like utils.render_key_image() but returns an id. Images from a path
+        (or None for black) are only rendered again when the file changed
+        """
+        if isinstance(image, pathlib.PurePath):
+            image = str(image)
+
+        if image is None or isinstance(image, str):
+            stamp = file_stamp(image)
+            cached = self._sources.get(image)
+
+            if cached is not None and cached[0] == stamp:
+                return self.incref(cached[1])
+
+            image_id = self.acquire(render_key_image(self.deck, image))
+
+            # the cache keeps a reference, keys still showing an older
+            # version of the file keep theirs
+            self.forget(image)
+            self._sources[image] = (stamp, image_id)
+
+            return self.incref(image_id)
+
+        return self.acquire(render_key_image(self.deck, image))
+
+    def forget(self, source):
+        """
+        drop a cached render, eg. the file changed on disk
+        """
+        if isinstance(source, pathlib.PurePath):
+            source = str(source)
+
+        _, image_id = self._sources.pop(source, (None, None))
+        self.release(image_id)
+
+
+def file_stamp(path):
+    if path is None:
+        return None
+
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+
+    return st.st_size, st.st_mtime_ns
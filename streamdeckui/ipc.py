@@ -0,0 +1,440 @@
+"""
+let other processes drive the deck without opening the HID device
+
+messages are a 4 byte big endian length followed by a json object. Key
+images are never sent over the socket, the client writes the already
+encoded images (see Key.set_image) into a shared memory segment and only
+sends their offsets:
+
+    {"id": 1, "op": "shm", "name": "psm_1234"}
+    {"id": 2, "op": "images", "page": "main", "shm": "psm_1234",
+     "images": [[key, state, offset, size], ...]}
+    {"id": 3, "op": "page", "name": "main"}
+    {"id": 4, "op": "prev_page"}
+    {"id": 5, "op": "brightness", "value": .4}
+    {"id": 6, "op": "subscribe"}
+
+a segment has to be registered with the shm op (it must belong to the
+same user as the client) before images can refer to it.
+
+every request gets a reply {"id": 1, "ok": true} or {"id": 1, "error": "..."}
+and once subscribed the client is sent {"event": "key_down", "key": 3, "page": "main"}
+"""
+
+import os
+import re
+import json
+import socket
+import struct
+import asyncio
+import itertools
+from multiprocessing import shared_memory
+
+from .key import Key
+
+import logging
+logger = logging.getLogger(__name__)
+
+HEADER = struct.Struct('>I')
+MAX_MESSAGE = 1 << 20
+
+SHM_NAME = re.compile(r'/?[\w.-]{1,250}')
+SHM_DIR = '/dev/shm'
+
+async def read_message(reader):
+    """
+    return the next message or None on eof
+    """
+    try:
+        header = await reader.readexactly(HEADER.size)
+    except asyncio.IncompleteReadError:
+        return None
+
+    size, = HEADER.unpack(header)
+    if size > MAX_MESSAGE:
+        raise ValueError(f"message too large: {size}")
+
+    return json.loads(await reader.readexactly(size))
+
+def encode_message(msg):
+    data = json.dumps(msg, separators=(',', ':')).encode()
+    return HEADER.pack(len(data)) + data
+
+def attach_shm(name):
+    try:
+        # python 3.13+, don't let the resource tracker unlink the client's segment
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+class Client:
+    """
+    server side state of one connected process
+    """
+
+    def __init__(self, server, reader, writer):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+
+        self.subscribed = False
+        self.dropped = 0  # events dropped because the client fell behind
+
+        # replies wait for room in the queue, events are dropped when it's full
+        self._queue = asyncio.Queue(server.max_queue)
+        self._shm = {}
+
+    def __str__(self):
+        return f"Client<{id(self):x}>"
+
+    def send_event(self, msg):
+        if not self.subscribed:
+            return
+
+        try:
+            self._queue.put_nowait(msg)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def run(self):
+        writer = asyncio.ensure_future(self._write())
+
+        try:
+            while True:
+                msg = await read_message(self.reader)
+                if msg is None:
+                    break
+
+                try:
+                    reply = self.server.handle(self, msg)
+                except (ValueError, KeyError, TypeError) as e:
+                    logger.warning("bad request from %s: %s", self, e)
+                    reply = {'error': str(e)}
+                except Exception as e:
+                    logger.exception(e)
+                    reply = {'error': str(e)}
+
+                reply['id'] = msg.get('id')
+                await self._queue.put(reply)
+        finally:
+            writer.cancel()
+            self.writer.close()
+
+            for shm in self._shm.values():
+                shm.close()
+
+    async def _write(self):
+        while True:
+            msg = await self._queue.get()
+            self.writer.write(encode_message(msg))
+            await self.writer.drain()
+
+    def peer_uid(self):
+        """
+        uid of the process on the other end of the socket, if the os tells us
+        """
+        sock = self.writer.get_extra_info('socket')
+        if sock is None or not hasattr(socket, 'SO_PEERCRED'):
+            return None
+
+        creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+        pid, uid, gid = struct.unpack('3i', creds)
+        return uid
+
+    def register_shm(self, name):
+        """
+        attach a segment the client created, only these can be used by images
+        """
+        if not isinstance(name, str) or not SHM_NAME.fullmatch(name):
+            raise ValueError(f"invalid shared memory name: {name!r}")
+
+        if name in self._shm:
+            return
+
+        # NOTE on linux segments are files, don't let a client point us at
+        # some other user's segment
+        uid = self.peer_uid()
+        path = os.path.join(SHM_DIR, name.lstrip('/'))
+
+        if uid is not None and os.path.isdir(SHM_DIR):
+            try:
+                owner = os.stat(path).st_uid
+            except FileNotFoundError:
+                raise ValueError(f"no such shared memory: {name}")
+
+            if owner != uid:
+                raise ValueError(f"shared memory {name} doesn't belong to client")
+
+        self._shm[name] = attach_shm(name)
+
+    def shm(self, name):
+        if name not in self._shm:
+            raise ValueError(f"shared memory not registered: {name!r}")
+
+        return self._shm[name]
+
+
+class IPCServer:
+    """
+    a unix socket server that forwards requests from other processes to
+    a Deck, see Deck.serve()
+    """
+
+    max_queue = 256  # per client
+
+    def __init__(self, deck, path, max_queue=None):
+        self._deck = deck
+        self.path = path
+        self.max_queue = max_queue or IPCServer.max_queue
+
+        self._server = None
+        self._clients = set()
+
+        self.requests = 0
+        self.images = 0
+
+    async def start(self):
+        self._server = await asyncio.start_unix_server(self._accept, path=self.path)
+
+        self._deck.key_up.connect(self.cb_key_up)
+        self._deck.key_down.connect(self.cb_key_down)
+
+        logger.debug("ipc listening on: %s", self.path)
+
+    async def stop(self):
+        if self._server is None:
+            return
+
+        self._deck.key_up.disconnect(self.cb_key_up)
+        self._deck.key_down.disconnect(self.cb_key_down)
+
+        self._server.close()
+
+        for client in self._clients:
+            client.writer.close()
+
+        await self._server.wait_closed()
+        self._server = None
+
+    async def _accept(self, reader, writer):
+        client = Client(self, reader, writer)
+        self._clients.add(client)
+        logger.debug("ipc client connected: %s", client)
+
+        try:
+            await client.run()
+        finally:
+            self._clients.discard(client)
+            logger.debug("ipc client gone: %s, dropped %d events", client, client.dropped)
+
+    def handle(self, client, msg):
+        self.requests += 1
+        op = msg.get('op')
+
+        if op == 'images':
+            self.set_images(client, msg)
+
+        elif op == 'shm':
+            client.register_shm(msg.get('name'))
+
+        elif op == 'page':
+            self._deck.change_page(self.page_name(msg.get('name')))
+
+        elif op == 'prev_page':
+            self._deck.prev_page()
+
+        elif op == 'brightness':
+            self._deck.brightness = msg['value']
+
+        elif op == 'subscribe':
+            client.subscribed = True
+
+        else:
+            raise ValueError(f"unknown op: {op}")
+
+        return {'ok': True}
+
+    def page_name(self, name):
+        if not isinstance(name, str) or name not in self._deck._pages:
+            raise ValueError(f"unknown page: {name!r}")
+
+        return name
+
+    def set_images(self, client, msg):
+        deck = self._deck
+        page = deck._pages[self.page_name(msg['page'])] if msg.get('page') else deck.page
+        buf = client.shm(msg.get('shm')).buf
+
+        images = msg['images']
+
+        # check everything before changing anything
+        for index, state, offset, size in images:
+            if not 0 <= index < len(page.keys):
+                raise ValueError(f"no such key: {index}")
+
+            if state not in (Key.UP, Key.DOWN):
+                raise ValueError(f"no such key state: {state}")
+
+            if offset < 0 or size <= 0 or offset + size > len(buf):
+                raise ValueError(f"image outside shared memory: {offset}+{size}")
+
+        for index, state, offset, size in images:
+            key = page.keys[index]
+
+            # copy out of shared memory, the client reuses it after our reply
+            key.set_image(state, memoryview(bytes(buf[offset:offset + size])))
+
+            if page is deck.page and key.state == state:
+                key.show_image(state)
+
+        self.images += len(msg['images'])
+
+    def send_event(self, event, key):
+        msg = {
+            'event': event,
+            'key': key.index,
+            'page': self._deck._page_history[-1],
+        }
+
+        for client in self._clients:
+            client.send_event(msg)
+
+    def cb_key_up(self, key):
+        self.send_event('key_up', key)
+
+    def cb_key_down(self, key):
+        self.send_event('key_down', key)
+
+
+class IPCClient:
+    """
+    the other end of IPCServer
+
+    client = IPCClient(path)
+    await client.connect()
+    await client.set_images([(0, Key.UP, image_bytes), ...])
+    await client.subscribe()
+    async for event in client.events(): ...
+    """
+
+    shm_size = 4 << 20
+
+    def __init__(self, path, shm_size=None):
+        self.path = path
+
+        self._reader = None
+        self._writer = None
+        self._task = None
+
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._events = asyncio.Queue()  # None once the connection is gone
+        self._closed = False
+
+        self._shm = shared_memory.SharedMemory(create=True, size=shm_size or IPCClient.shm_size)
+        self._lock = asyncio.Lock()  # one images request at a time owns the shm
+
+    async def connect(self):
+        self._reader, self._writer = await asyncio.open_unix_connection(self.path)
+        self._task = asyncio.ensure_future(self._read())
+
+        await self.request('shm', name=self._shm.name)
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._task.cancel()
+            self._writer = None
+
+        self._shm.close()
+        self._shm.unlink()
+
+    async def request(self, op, **kw):
+        if self._closed:
+            raise ConnectionError("ipc connection closed")
+
+        msg = dict(kw, op=op, id=next(self._ids))
+
+        fut = asyncio.get_event_loop().create_future()
+        self._pending[msg['id']] = fut
+
+        self._writer.write(encode_message(msg))
+        await self._writer.drain()
+
+        reply = await fut
+        if 'error' in reply:
+            raise RuntimeError(reply['error'])
+
+        return reply
+
+    async def set_images(self, images, page=None):
+        """
+        images: list of (key index, state, encoded image)
+        """
+        async with self._lock:
+            buf = self._shm.buf
+            refs = []
+            offset = 0
+
+            for index, state, image in images:
+                size = len(image)
+                if offset + size > len(buf):
+                    raise ValueError("images don't fit in shared memory")
+
+                buf[offset:offset + size] = image
+                refs.append((index, state, offset, size))
+                offset += size
+
+            return await self.request('images', page=page, shm=self._shm.name, images=refs)
+
+    async def change_page(self, name):
+        return await self.request('page', name=name)
+
+    async def prev_page(self):
+        return await self.request('prev_page')
+
+    async def set_brightness(self, value):
+        return await self.request('brightness', value=value)
+
+    async def subscribe(self):
+        return await self.request('subscribe')
+
+    async def events(self):
+        """
+        yield events until the connection goes away
+        """
+        while True:
+            msg = await self._events.get()
+
+            if msg is None:
+                self._events.put_nowait(None)  # for anyone else waiting
+                return
+
+            yield msg
+
+    async def _read(self):
+        try:
+            while True:
+                msg = await read_message(self._reader)
+                if msg is None:
+                    break
+
+                if 'event' in msg:
+                    self._events.put_nowait(msg)
+                else:
+                    self._pending.pop(msg['id']).set_result(msg)
+
+        except (OSError, ValueError, KeyError, EOFError) as e:
+            logger.warning("ipc connection lost: %s", e)
+
+        finally:
+            # NOTE also on close(), nothing is going to answer these now
+            self._closed = True
+
+            for fut in self._pending.values():
+                if not fut.done():
+                    fut.set_exception(ConnectionError("ipc connection closed"))
+
+            self._pending.clear()
+            self._events.put_nowait(None)
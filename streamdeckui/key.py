@@ -1,9 +1,7 @@
-import asyncio
 import weakref
-import pathlib
 
 from .utils import ASSET_PATH
-from .utils import crop_image, render_key_image, add_text, solid_image
+from .utils import crop_image, add_text
 
 import logging
 logger = logging.getLogger(__name__)
@@ -12,12 +10,21 @@ class Key:
     UP = 0
     DOWN = 1
 
+    # connect() flags
+    CONN_UP = 1
+    CONN_DOWN = 2
+
+    # there can be thousands of keys, keep them small. Subclasses that
+    # don't declare __slots__ still work, they just get a __dict__
+    __slots__ = ('_page', '_images', '_state', '_flags', '__weakref__')
+
     def __init__(self, page, **kw):
         self._page = weakref.ref(page)
-        self._images = {}
+        self._images = [None, None] # ids into deck.images, indexed by state
         self._state = Key.UP
+        self._flags = 0
 
-        up_image = kw.get('up_image', solid_image(self.deck))
+        up_image = kw.get('up_image') # None renders a solid black image
         down_image = kw.get('down_image', ASSET_PATH / 'pressed.png')
 
         self.set_image(Key.UP, up_image)
@@ -59,19 +66,28 @@ class Key:
         # NOTE weird stuff happens if you try to reify this
         return self.page.key_index(self)
 
-    def connect(self, up, down):
+    def spawn(self, coro):
         """
-        connect to keypress signals
+        run coro as a task owned by our page, use this for anything long
+        running (fetches, animations, etc) so it gets cancelled or paused
+        when the page goes into the background
         """
-        if up:
-            self.deck.key_up.connect(self.cb_key_up, sender=self)
-        else:
-            self.deck.key_up.disconnect(self.cb_key_up, sender=self)
+        return self.page.tasks.spawn(coro)
 
-        if down:
-            self.deck.key_down.connect(self.cb_key_down, sender=self)
-        else:
-            self.deck.key_down.disconnect(self.cb_key_down, sender=self)
+    def page_out(self):
+        """
+        our page is going into the background, see GestureKeyMixin
+        """
+        pass
+
+    def connect(self, up, down):
+        """
+        choose whether cb_key_up/cb_key_down are called, see Page.dispatch
+
+        NOTE the deck's key_up/key_down signals are still sent with the key
+        as sender for anyone else that's interested
+        """
+        self._flags = (Key.CONN_UP if up else 0) | (Key.CONN_DOWN if down else 0)
 
     async def cb_key_up(self, *args, **kw):
         self.state = Key.UP
@@ -84,9 +100,11 @@ class Key:
             return
 
         # logger.debug("adding label: %s", text)
-        image = self._images[state]
-        image = add_text(self.deck, image, text)
-        self.set_image(state, image)
+        image = add_text(self.deck, self.image(state), text)
+        self._replace(state, self.deck.images.acquire(image))
+
+        if self.deck._assets is not None:
+            self.deck._assets.label(self, state, text)
 
         if show:
             self.show_image(state)
@@ -106,16 +124,43 @@ class Key:
         # takes an image and a callback. That way for a given state, the callback
         # could be different. Default to standard callback of course.
 
-        if isinstance(image, pathlib.PurePath):
-            image = str(image)
+        self._replace(state, self.deck.images.render(image))
 
-        image = render_key_image(self.deck, image)
-        self._images[state] = image
+        if self.deck._assets is not None:
+            self.deck._assets.track(self, state, image)
+
+    def image(self, state):
+        """
+        the rendered image for state
+        """
+        return self.deck.images[self._images[state]]
+
+    def image_id(self, state):
+        return self._images[state]
+
+    def set_image_id(self, state, image_id):
+        """
+        like set_image() for an image already in deck.images
+        """
+        self._replace(state, self.deck.images.incref(image_id))
+
+    def _replace(self, state, image_id):
+        # take ownership of image_id and release the image it replaces
+        if state >= len(self._images):
+            self._images.extend([None] * (state + 1 - len(self._images)))
+
+        old, self._images[state] = self._images[state], image_id
+        self.deck.images.release(old)
 
     def show_image(self, state):
+        # our page isn't visible, don't clobber whatever is. The image is
+        # shown by Page.repaint() when the page comes back
+        if self.page is not self.deck.page:
+            return
+
         if self.index < 0:
             return
 
         with self.deck:
-            image = self._images[state]
+            image = self.image(state)
             self.device.set_key_image(self.index, image)
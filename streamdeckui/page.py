@@ -2,6 +2,9 @@ import weakref
 
 from .utils import resize_image
 from .key import Key
+from .touch import Dial, DialEventType
+from .tasks import TaskGroup
+from .assets import CROP
 
 import logging
 logger = logging.getLogger(__name__)
@@ -9,13 +12,30 @@ logger = logging.getLogger(__name__)
 async def async_repaint(sender):
     sender.repaint()
 
+async def async_page_in(sender):
+    sender.tasks.page_in()
+
+async def async_page_out(sender):
+    sender.tasks.page_out()
+
+    for key in sender.keys:
+        key.page_out()
+
 class Page:
+    # what happens to tasks started by our keys when we go into the
+    # background, see TaskGroup
+    task_policy = TaskGroup.CANCEL
 
-    def __init__(self, deck, keys):
+    def __init__(self, deck, keys, dials=None):
         self._deck = weakref.ref(deck) # deck ui object
         self._keys = []
+        self._regions = [] # touchscreen, see add_region()
+
+        self.tasks = TaskGroup(deck._loop, self.task_policy)
 
         self.deck.page_in.connect(async_repaint, sender=self)
+        self.deck.page_in.connect(async_page_in, sender=self)
+        self.deck.page_out.connect(async_page_out, sender=self)
 
         if keys is None:
             self._keys = [
@@ -25,6 +45,13 @@ class Page:
         else:
             self._keys = keys
 
+        if dials is None:
+            # NOTE older streamdeck libraries don't have dial_count()
+            dial_count = getattr(self.device, 'dial_count', lambda: 0)
+            self._dials = [Dial(self) for i in range(dial_count())]
+        else:
+            self._dials = dials
+
     def __str__(self):
         return self.__class__.__name__
 
@@ -41,6 +68,28 @@ class Page:
     def keys(self):
         return self._keys
 
+    @property
+    def dials(self):
+        return self._dials
+
+    @property
+    def regions(self):
+        return self._regions
+
+    def add_region(self, region):
+        """
+        add a touch.TouchRegion, regions shouldn't overlap
+        """
+        self._regions.append(region)
+        return region
+
+    def region_at(self, x, y):
+        for region in self._regions:
+            if region.contains(x, y):
+                return region
+
+        return None
+
     def key_index(self, key):
         # HACK during Key.__init__ we often reference its index which calls this.
         # since the key hasn't been added to self.keys we call_soon() but
@@ -51,10 +100,62 @@ class Page:
         except ValueError:
             return -1
 
+    def dispatch(self, key, pressed):
+        """
+        call key's cb_key_down/cb_key_up, unless it opted out via
+        Key.connect(). Returns [(callback, task)] like signal.send_async()
+        """
+        if pressed:
+            if not key._flags & Key.CONN_DOWN:
+                return []
+            cb = key.cb_key_down
+        else:
+            if not key._flags & Key.CONN_UP:
+                return []
+            cb = key.cb_key_up
+
+        return [(cb, self.deck._loop.create_task(cb(key)))]
+
+    def dispatch_dial(self, dial, event, value):
+        """
+        like dispatch() but for a dial turning or being pushed
+        """
+        if event == DialEventType.TURN:
+            cb = dial.cb_dial_turn(value)
+        else:
+            cb = dial.cb_dial_push(value)
+
+        return [(dial, self.deck._loop.create_task(cb))]
+
+    def dispatch_touch(self, event, value):
+        """
+        like dispatch() for the region that was touched, value is the dict
+        from the device with screen coordinates
+        """
+        region = self.region_at(value['x'], value['y'])
+        if region is None:
+            return []
+
+        # make coordinates relative to the region
+        rx, ry = region.rect[:2]
+        value = dict(value)
+        value['x'] -= rx
+        value['y'] -= ry
+
+        if 'x_out' in value:
+            value['x_out'] -= rx
+            value['y_out'] -= ry
+
+        cb = region.cb_touch(event, **value)
+        return [(region, self.deck._loop.create_task(cb))]
+
     def repaint(self):
         for key in self.keys:
             key.show_image(key.state)
 
+        for region in self.regions:
+            region.repaint()
+
     def background(self, image):
         """
         load and resize a source image so that it will fill the given deck
@@ -63,6 +164,11 @@ class Page:
 
         logger.debug(f"created deck image size of {deck_image.width}x{deck_image.height}")
 
+        assets = self.deck._assets
+
         for key in self.keys:
             kimage = key.crop_image(deck_image)
             key.set_image(Key.UP, kimage)
+
+            if assets is not None:
+                assets.track(key, Key.UP, image, kind=CROP)
@@ -6,6 +6,8 @@ from contextlib import suppress
 from functools import partial
 import itertools
 
+from .clock import as_clock
+
 import logging
 logger = logging.getLogger(__name__)
 
@@ -21,9 +23,13 @@ def is_async(func):
 
 class Periodic:
     def __init__(self, loop, time, func, *func_args, **func_kwargs):
+        """
+        loop can also be a clock (see clock.py), the sleeping is done by it
+        """
         self.time = time
         self.func = (func, func_args, func_kwargs)
-        self.loop = loop or asyncio.get_event_loop()
+        self.clock = as_clock(loop)
+        self.loop = self.clock.loop
 
         self.is_started = False
         self._task      = None
@@ -51,7 +57,7 @@ class Periodic:
         _is_async = is_async(func)
 
         while True:
-            await asyncio.sleep(self.time)
+            await self.clock.sleep(self.time)
             # logger.debug(f"{self.__class__.__name__} tick {self.time}")
 
             if _is_async:
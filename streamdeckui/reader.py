@@ -0,0 +1,335 @@
+import os
+import ctypes
+import select
+import threading
+
+try:
+    from StreamDeck.Devices.StreamDeck import ControlType, DialEventType
+except ImportError:
+    # streamdeck < 0.9.4 only knows about keys
+    ControlType = DialEventType = None
+
+import logging
+logger = logging.getLogger(__name__)
+
+def find_hidraw(device):
+    """
+    return the /dev/hidrawN node for a StreamDeck device, or None
+    """
+    base = '/sys/class/hidraw'
+    if not os.path.isdir(base):
+        return None
+
+    vid, pid = device.vendor_id(), device.product_id()
+    hid_id = f"{vid:08X}:{pid:08X}"
+
+    try:
+        serial = device.get_serial_number()
+    except Exception:
+        serial = None
+
+    candidates = []
+
+    for name in sorted(os.listdir(base)):
+        try:
+            with open(os.path.join(base, name, 'device', 'uevent')) as f:
+                uevent = dict(line.strip().split('=', 1) for line in f if '=' in line)
+        except OSError:
+            continue
+
+        if not uevent.get('HID_ID', '').upper().endswith(hid_id):
+            continue
+
+        if serial and uevent.get('HID_UNIQ') == serial:
+            return f"/dev/{name}"
+
+        candidates.append(f"/dev/{name}")
+
+    # no serial to go by, only trust an unambiguous match
+    return candidates[0] if len(candidates) == 1 else None
+
+
+def transport_read(device):
+    """
+    return (hid_read_timeout, handle) for a device opened through the
+    StreamDeck library's libusb hidapi transport, or None
+    """
+    transport = getattr(device, 'device', None)
+    library = getattr(getattr(transport, 'hidapi', None), 'hidapi', None)
+    handle = getattr(transport, 'device_handle', None)
+
+    if library is None or not handle:
+        return None
+
+    try:
+        read = library.hid_read_timeout
+    except AttributeError:
+        return None
+
+    # NOTE the library only declares the functions it uses itself
+    read.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_size_t, ctypes.c_int]
+    read.restype = ctypes.c_int
+
+    return read, handle
+
+
+class _Report:
+    """
+    stands in for the device so the library's own _read_control_states()
+    parses a report we already read, whatever the model
+    """
+
+    def __init__(self, device):
+        self._device = device
+        self.device = self  # the parser reads from self.device
+        self.report = None
+
+    def __getattr__(self, name):
+        return getattr(self._device, name)
+
+    def read(self, length):
+        report, self.report = self.report, None
+        if report is None:
+            return None
+
+        # NOTE zero padded to length like the library's own read()
+        return bytes(report[:length]).ljust(length, b'\0')
+
+
+class InputReader:
+    """
+    read key (and dial/touch) reports ourselves instead of through the
+    StreamDeck library's reader thread, which polls in a sleep loop adding
+    up to 1/read_poll_hz of latency to every press
+
+    mode 'transport': a thread blocks in hidapi's hid_read_timeout() on the
+                      library's own device handle, it returns as soon as a
+                      report arrives
+    mode 'loop':      the event loop watches a non-blocking hidraw fd,
+                      nothing runs between reports
+    mode 'thread':    a thread blocks on the hidraw fd and hands reports to
+                      the loop
+
+    NOTE libhidapi-libusb, which the library uses on linux, detaches the
+    kernel's HID driver while the device is open so there's usually no
+    /dev/hidrawN to read. The hidraw modes are for hidapi builds that leave
+    it in place, and for tests
+
+    keys go straight to Deck.dispatch_keypress() unless the key callback was
+    swapped out (eg. Timers while the screen is off) in which case the
+    device's callback is called like the library would.
+
+    fd: use this file descriptor instead of opening hidraw, eg. one end of a
+        socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET) in tests.
+        Each read must return exactly one report.
+    """
+
+    report_size = 1024  # larger than any stream deck input report
+    read_timeout = 100  # ms, how long stop() may wait on the transport thread
+
+    def __init__(self, deck, mode='transport', fd=None):
+        if mode not in ('transport', 'loop', 'thread'):
+            raise ValueError(f"unknown input reader mode: {mode}")
+
+        if mode == 'transport' and fd is not None:
+            raise ValueError("an fd needs the 'loop' or 'thread' mode")
+
+        self.deck = deck
+        self.mode = mode
+
+        self._loop = deck._loop
+        self._device = deck._deck
+        self._report = _Report(self._device)
+
+        self._fd = fd
+        self._own_fd = fd is None
+
+        self._thread = None
+        self._wake = None  # pipe to wake the reader thread on stop()
+        self._running = False
+
+        self.reports = 0
+
+    def start(self):
+        if self.mode == 'transport':
+            transport = transport_read(self._device)
+            if transport is None:
+                raise OSError("stream deck isn't open through the libusb hidapi transport")
+
+        elif self._fd is None:
+            path = find_hidraw(self._device)
+            if path is None:
+                raise OSError("no hidraw device found for this stream deck, try mode='transport'")
+
+            flags = os.O_RDONLY | os.O_CLOEXEC
+            if self.mode == 'loop':
+                flags |= os.O_NONBLOCK
+
+            self._fd = os.open(path, flags)
+            logger.debug("reading input from: %s", path)
+
+        # stop the library's polling thread, we're taking over
+        if hasattr(self._device, '_setup_reader'):
+            self._device._setup_reader(None)
+
+        self._running = True
+
+        if self.mode == 'loop':
+            os.set_blocking(self._fd, False)
+            self._loop.add_reader(self._fd, self._cb_readable)
+        elif self.mode == 'transport':
+            self._thread = threading.Thread(
+                target=self._run_transport,
+                args=transport,
+                name='streamdeckui-input',
+                daemon=True
+            )
+            self._thread.start()
+        else:
+            self._wake = os.pipe()
+            self._thread = threading.Thread(
+                target=self._run,
+                name='streamdeckui-input',
+                daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, restore=True):
+        """
+        stop reading, with restore the library's reader thread takes over
+        again. Deck.release() passes False, it's about to close the device
+        """
+        if not self._running:
+            return
+
+        self._running = False
+
+        if self.mode == 'loop':
+            self._loop.remove_reader(self._fd)
+        elif self.mode == 'transport':
+            # NOTE the device must not be closed under a blocked read
+            self._thread.join()
+        else:
+            os.write(self._wake[1], b'x')
+            self._thread.join()
+
+            for fd in self._wake:
+                os.close(fd)
+
+        if self._fd is not None and self._own_fd:
+            os.close(self._fd)
+
+        self._fd = None
+
+        if restore and hasattr(self._device, '_setup_reader'):
+            self._device._setup_reader(self._device._read)
+
+    def _cb_readable(self):
+        # NOTE drain everything that's waiting, a burst of presses arrives as
+        # several reports but only one wakeup
+        while True:
+            try:
+                report = os.read(self._fd, self.report_size)
+            except BlockingIOError:
+                return
+
+            if not report:
+                self._loop.remove_reader(self._fd)
+                return
+
+            self.handle(report)
+
+    def _run_transport(self, read, handle):
+        # NOTE we're in the reader thread. No lock, the library only holds its
+        # mutex around hidapi calls and hidapi is fine with one thread reading
+        # while another writes
+        buf = ctypes.create_string_buffer(self.report_size)
+
+        while self._running:
+            result = read(handle, buf, len(buf), self.read_timeout)
+
+            if result < 0:
+                logger.error("input reader stopped: hid_read_timeout() failed (%d)", result)
+                return
+
+            if result:
+                self._loop.call_soon_threadsafe(self.handle, buf.raw[:result])
+
+    def _run(self):
+        # NOTE we're in the reader thread
+        while True:
+            ready, _, _ = select.select([self._fd, self._wake[0]], [], [])
+
+            if self._wake[0] in ready:
+                return
+
+            try:
+                report = os.read(self._fd, self.report_size)
+            except OSError as e:
+                logger.error("input reader stopped: %s", e)
+                return
+
+            if not report:
+                return
+
+            self._loop.call_soon_threadsafe(self.handle, report)
+
+    def handle(self, report):
+        """
+        parse a raw report and fire callbacks for whatever changed
+        """
+        self.reports += 1
+        device = self._device
+
+        self._report.report = report
+        if ControlType is not None and hasattr(device, '_read_control_states'):
+            states = type(device)._read_control_states(self._report)
+        else:
+            states = type(device)._read_key_states(self._report)
+            states = {ControlType.KEY if ControlType else 'keys': states}
+
+        if not states:
+            return
+
+        for control, value in states.items():
+            if ControlType is None or control == ControlType.KEY:
+                self._keys(value)
+            elif control == ControlType.DIAL:
+                self._dials(value)
+            elif control == ControlType.TOUCHSCREEN:
+                callback = getattr(device, 'touchscreen_callback', None)
+                if callback is not None:
+                    callback(device, *value)
+
+    def _keys(self, states):
+        device = self._device
+        deck = self.deck
+
+        for k, (old, new) in enumerate(zip(device.last_key_states, states)):
+            if old == new:
+                continue
+
+            device.last_key_states[k] = new
+
+            callback = device.key_callback
+            if callback == deck.cb_keypress:
+                deck.dispatch_keypress(device, k, new)  # skip the thread hop
+            elif callback is not None:
+                callback(device, k, new)
+
+    def _dials(self, events):
+        device = self._device
+        callback = getattr(device, 'dial_callback', None)
+
+        for k, (old, new) in enumerate(zip(device.last_dial_states, events.get(DialEventType.PUSH, []))):
+            if old == new:
+                continue
+
+            device.last_dial_states[k] = new
+
+            if callback is not None:
+                callback(device, k, DialEventType.PUSH, new)
+
+        for k, amount in enumerate(events.get(DialEventType.TURN, [])):
+            if amount and callback is not None:
+                callback(device, k, DialEventType.TURN, amount)
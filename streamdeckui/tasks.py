@@ -0,0 +1,88 @@
+import asyncio
+
+import logging
+logger = logging.getLogger(__name__)
+
+class TaskGroup:
+    """
+    tracks the tasks started on behalf of a page (see Key.spawn) so that
+    they can be dealt with when the page goes into the background
+
+    policy is one of:
+    cancel: cancel all running tasks on page_out (default)
+    pause:  tasks keep running but block in checkpoint() until page_in
+    keep:   leave them alone
+
+    NOTE regardless of policy a key on a background page never writes to
+    the device, see Key.show_image
+    """
+
+    CANCEL = 'cancel'
+    PAUSE  = 'pause'
+    KEEP   = 'keep'
+
+    def __init__(self, loop, policy=CANCEL):
+        if policy not in (self.CANCEL, self.PAUSE, self.KEEP):
+            raise ValueError(f"unknown task policy: {policy}")
+
+        self._loop = loop
+        self.policy = policy
+
+        self._tasks = set()
+        self._running = asyncio.Event()
+        self._running.set()
+
+    def __len__(self):
+        return len(self._tasks)
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    def spawn(self, coro):
+        task = self._loop.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._done)
+        return task
+
+    def _done(self, task):
+        self._tasks.discard(task)
+        log_exception(task)
+
+    async def checkpoint(self):
+        """
+        long running tasks should await this now and then, it returns
+        immediately unless the group is paused
+        """
+        await self._running.wait()
+
+    def pause(self):
+        self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def cancel(self):
+        for task in list(self._tasks):
+            task.cancel()
+
+    def page_out(self):
+        if self.policy == self.CANCEL:
+            self.cancel()
+        elif self.policy == self.PAUSE:
+            self.pause()
+
+    def page_in(self):
+        self.resume()
+
+
+def log_exception(task):
+    """
+    done callback so exceptions in fire-and-forget tasks don't disappear
+    """
+    if task.cancelled():
+        return
+
+    exc = task.exception()
+    if exc is not None:
+        logger.error("task %s failed", task, exc_info=exc)
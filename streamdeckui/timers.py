@@ -15,9 +15,9 @@ class Timers:
     dim_time = 30
     off_time = 60 # set after dim_timer fires
 
-    def __init__(self, deck, loop, **kw):
+    def __init__(self, deck, **kw):
         self._deck = weakref.ref(deck)
-        self._loop = loop
+        self._clock = deck.clock
 
         self.dim_time = kw.get('dim_time', Timers.dim_time)
         self.off_time = kw.get('off_time', Timers.off_time)
@@ -43,7 +43,7 @@ class Timers:
 
     def cb_dim_timer(self):
         self.device.set_brightness(self.deck.brightness / 2)
-        self._off_timer = self._loop.call_later(self.off_time, self.cb_off_timer)
+        self._off_timer = self._clock.call_later(self.off_time, self.cb_off_timer)
 
     def cb_off_timer(self):
         self.deck.turn_off()
@@ -84,4 +84,4 @@ class Timers:
         if self._off_timer:
             self._off_timer.cancel()
 
-        self._dim_timer = self._loop.call_later(self.dim_time, self.cb_dim_timer)
+        self._dim_timer = self._clock.call_later(self.dim_time, self.cb_dim_timer)
@@ -0,0 +1,228 @@
+import io
+import weakref
+
+from PIL import Image, ImageChops
+
+try:
+    from StreamDeck.Devices.StreamDeck import DialEventType, TouchscreenEventType
+except ImportError:
+    # streamdeck < 0.9.4 doesn't know about dials or touchscreens
+    DialEventType = TouchscreenEventType = None
+
+import logging
+logger = logging.getLogger(__name__)
+
+class Dial:
+    """
+    a rotary encoder on a Stream Deck +, the Key of dials
+
+    override cb_dial_turn() and cb_dial_push() in a subclass
+    """
+
+    __slots__ = ('_page', 'pressed', '__weakref__')
+
+    def __init__(self, page):
+        self._page = weakref.ref(page)
+        self.pressed = False
+
+    def __str__(self):
+        return f"Dial<{self.index}>"
+
+    @property
+    def page(self):
+        return self._page()
+
+    @property
+    def deck(self):
+        return self.page.deck
+
+    @property
+    def index(self):
+        try:
+            return self.page.dials.index(self)
+        except ValueError:
+            return -1
+
+    def spawn(self, coro):
+        """
+        see Key.spawn()
+        """
+        return self.page.tasks.spawn(coro)
+
+    async def cb_dial_turn(self, amount):
+        """
+        amount is the number of detents turned, negative is counter clockwise
+        """
+        pass
+
+    async def cb_dial_push(self, pressed):
+        self.pressed = pressed
+
+
+class TouchRegion:
+    """
+    a rectangle of a touchscreen (the Stream Deck + lcd strip) that draws
+    itself from a stack of layers
+
+    each layer is a cached RGBA image the size of the region, draw into it
+    with layer() and call update() when done. Only the rectangle that
+    actually changed since the last update() is sent to the device, so a
+    clock ticking in one corner doesn't resend the whole strip.
+
+    region = TouchRegion(page, 0, 0, 200, 100, background='navy')
+    draw = ImageDraw.Draw(region.layer('text'))
+    draw.text(...)
+    region.update()
+    """
+
+    background = 'black'
+
+    def __init__(self, page, x, y, width, height, **kw):
+        self._page = weakref.ref(page)
+        self.rect = (x, y, width, height)
+
+        self.background = kw.get('background', TouchRegion.background)
+
+        self._layers = {}   # name -> RGBA image, in draw order
+        self._frame = None  # flattened layers, what update() would show
+        self._shown = None  # what the device is currently showing
+
+    def __str__(self):
+        return "TouchRegion<{},{} {}x{}>".format(*self.rect)
+
+    @property
+    def page(self):
+        return self._page()
+
+    @property
+    def deck(self):
+        return self.page.deck
+
+    @property
+    def device(self):
+        return self.page.deck._deck
+
+    @property
+    def size(self):
+        return self.rect[2:]
+
+    def contains(self, x, y):
+        rx, ry, width, height = self.rect
+        return rx <= x < rx + width and ry <= y < ry + height
+
+    def spawn(self, coro):
+        """
+        see Key.spawn()
+        """
+        return self.page.tasks.spawn(coro)
+
+    def layer(self, name, clear=False):
+        """
+        the image for layer name, created (transparent) if it doesn't exist
+        yet. Layers are drawn in the order they were created
+        """
+        image = self._layers.get(name)
+
+        if image is None or clear:
+            image = Image.new('RGBA', self.size, (0, 0, 0, 0))
+            self._layers[name] = image
+
+        self._frame = None
+        return image
+
+    def set_layer(self, name, image, pos=(0, 0)):
+        """
+        replace layer name with image, pasted at pos within the region
+        """
+        layer = self.layer(name, clear=True)
+        image = image.convert('RGBA')
+        layer.paste(image, pos, image)
+
+    def remove_layer(self, name):
+        if self._layers.pop(name, None) is not None:
+            self._frame = None
+
+    def frame(self):
+        """
+        all the layers flattened onto the background
+        """
+        if self._frame is None:
+            frame = Image.new('RGBA', self.size, self.background)
+
+            for layer in self._layers.values():
+                frame.alpha_composite(layer)
+
+            self._frame = frame.convert('RGB')
+
+        return self._frame
+
+    def damage(self):
+        """
+        the (left, upper, right, lower) box that changed since the device was
+        last updated, or None
+        """
+        frame = self.frame()
+
+        if self._shown is None:
+            return (0, 0) + self.size
+
+        return ImageChops.difference(frame, self._shown).getbbox()
+
+    def update(self):
+        """
+        send whatever changed to the device
+        """
+        # our page isn't visible, see Key.show_image(). Page.repaint() sends
+        # everything when it comes back
+        if self.page is not self.deck.page:
+            return
+
+        box = self.damage()
+        if box is None:
+            return
+
+        frame = self.frame()
+        x, y = self.rect[:2]
+        left, upper, right, lower = box
+
+        image = to_native(self.device, frame.crop(box))
+
+        with self.deck:
+            self.device.set_touchscreen_image(
+                image, x + left, y + upper, right - left, lower - upper
+            )
+
+        self._shown = frame
+
+    def repaint(self):
+        # the screen has been showing some other page, start over
+        self._shown = None
+        self.update()
+
+    async def cb_touch(self, event, x, y, **kw):
+        """
+        event is a TouchscreenEventType, x and y are relative to the region.
+        A drag has x_out and y_out where it ended (possibly outside of us)
+        """
+        pass
+
+
+def to_native(device, image):
+    """
+    like PILHelper.to_native_touchscreen_format() but for any part of the
+    touchscreen, PILHelper would scale it up to the whole screen
+    """
+    image_format = device.touchscreen_image_format()
+
+    if image_format['rotation']:
+        image = image.rotate(image_format['rotation'], expand=True)
+
+    if image_format['flip'][0]:
+        image = image.transpose(Image.FLIP_LEFT_RIGHT)
+
+    if image_format['flip'][1]:
+        image = image.transpose(Image.FLIP_TOP_BOTTOM)
+
+    with io.BytesIO() as buf:
+        image.save(buf, image_format['format'], quality=100)
+        return buf.getvalue()
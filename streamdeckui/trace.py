@@ -0,0 +1,301 @@
+import time
+import struct
+import asyncio
+import threading
+
+import logging
+logger = logging.getLogger(__name__)
+
+# file header then one EVENT per key change
+HEADER  = struct.Struct('<4sBxH')  # magic, version, key count
+EVENT   = struct.Struct('<IBB')    # usecs since previous event, key, pressed
+MAGIC   = b'SDTR'
+VERSION = 1
+
+MAX_DELTA = 0xffffffff  # ~71 minutes, longer gaps are recorded as this
+
+class TraceRecorder:
+    """
+    write every key event the Deck sees to a compact binary file, 6 bytes
+    per event. Enable with Deck(..., record=path), replay with replay()
+
+    times come from the deck's clock so a trace recorded under a
+    VirtualClock has virtual timings
+    """
+
+    def __init__(self, path, clock, key_count):
+        self.path = path
+        self._clock = clock
+        self._lock = threading.Lock()  # cb_keypress is called from a thread
+
+        self._file = open(path, 'wb')
+        self._file.write(HEADER.pack(MAGIC, VERSION, key_count))
+
+        self._last = None
+        self.events = 0
+
+    def record(self, key, pressed):
+        with self._lock:
+            if self._file is None:
+                return
+
+            now = self._clock.time()
+            last, self._last = self._last, now
+
+            delta = 0 if last is None else round((now - last) * 1e6)
+            delta = min(max(delta, 0), MAX_DELTA)
+
+            self._file.write(EVENT.pack(delta, key, bool(pressed)))
+            self.events += 1
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_trace(path):
+    """
+    return (key_count, [(seconds since first event, key, pressed), ...])
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    magic, version, key_count = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"not a key trace: {path}")
+
+    if version != VERSION:
+        raise ValueError(f"unsupported key trace version {version}: {path}")
+
+    events = []
+    offset = 0
+
+    for delta, key, pressed in EVENT.iter_unpack(data[HEADER.size:]):
+        offset += delta
+        events.append((offset / 1e6, key, bool(pressed)))
+
+    return key_count, events
+
+
+class ReplayStats:
+    """
+    what happened during a replay()
+
+    renders: every key image write to the device is matched to the oldest
+    replayed event on that key still waiting for one. It's late if the
+    write came more than budget after the event was injected, or never
+    came. backlog is the most events waiting for their write at once
+
+    dispatch: an event is dispatched once every callback it triggered has
+    finished. Dropped events were never dispatched to the page (eg.
+    swallowed waking the screen up, or errored)
+    """
+
+    def __init__(self, budget):
+        self.budget = budget
+
+        self.events = 0      # injected into the device
+        self.behind = 0      # injected later than the trace said, we fell behind
+        self.elapsed = 0
+
+        # renders
+        self.writes = 0      # key images written, replayed or not
+        self.rendered = 0    # events whose key image was written
+        self.unrendered = 0  # events whose key image never was
+        self.late = 0        # written later than budget, or never
+        self.backlog = 0     # most events waiting for their key image at once
+        self.frame_latencies = []  # seconds from injection to key image written
+
+        # dispatch
+        self.dispatched = 0
+        self.dropped = 0
+        self.in_flight = 0   # most events being dispatched at once
+        self.slow_dispatch = 0  # took longer than budget to dispatch
+        self.dispatch_latencies = []  # seconds, per dispatched event
+
+        self._in_flight = 0
+        self._pending = {}   # key -> [injection time, ...] waiting for a write
+        self._waiting = 0
+
+    @property
+    def throughput(self):
+        """
+        rendered events per second
+        """
+        return self.rendered / self.elapsed if self.elapsed else 0
+
+    def percentile(self, pct, latencies=None):
+        """
+        of frame_latencies, unless given others (eg. dispatch_latencies)
+        """
+        latencies = sorted(self.frame_latencies if latencies is None else latencies)
+        if not latencies:
+            return 0
+
+        return latencies[min(len(latencies) - 1, int(len(latencies) * pct / 100))]
+
+    def __str__(self):
+        return (
+            f"{self.events} events in {self.elapsed:.3f}s, "
+            f"{self.throughput:.0f} rendered/s, "
+            f"frame p50 {self.percentile(50) * 1000:.2f}ms "
+            f"p99 {self.percentile(99) * 1000:.2f}ms, "
+            f"max backlog {self.backlog}, {self.late} late, "
+            f"{self.unrendered} unrendered, "
+            f"dispatch p99 {self.percentile(99, self.dispatch_latencies) * 1000:.2f}ms, "
+            f"{self.dropped} dropped, {self.behind} behind"
+        )
+
+    def _inject(self, key, sent):
+        self._pending.setdefault(key, []).append(sent)
+        self._waiting += 1
+        self.backlog = max(self.backlog, self._waiting)
+
+    def _uninject(self, key):
+        self._pending[key].pop()
+        self._waiting -= 1
+
+    def _written(self, key):
+        self.writes += 1
+
+        pending = self._pending.get(key)
+        if not pending:
+            return  # not ours, eg. a page change or the screen dimming
+
+        latency = time.perf_counter() - pending.pop(0)
+        self._waiting -= 1
+
+        self.rendered += 1
+        self.frame_latencies.append(latency)
+        self.late += latency > self.budget
+
+    def _finish(self):
+        self.unrendered = self._waiting
+        self.late += self._waiting
+
+
+async def replay(deck, path, speed=1.0, budget=1/60, timeout=5):
+    """
+    press keys on deck's FakeDevice exactly as recorded in the trace at path
+
+    speed: 1 is real time, 10 is ten times faster, None (or 0) injects
+           events as fast as the loop will take them
+    budget: seconds from an event to its key image being written before it
+            counts as late, a frame at 60Hz by default
+    timeout: seconds to wait for stragglers after the last event
+
+    pacing is in wall time, not deck.clock, this is a load test. The
+    device's set_key_image() is wrapped while replaying to time renders
+    """
+    key_count, events = read_trace(path)
+
+    device = deck._deck
+    if key_count != device.key_count():
+        logger.warning("trace recorded on %d keys, replaying on %d", key_count, device.key_count())
+
+    stats = ReplayStats(budget)
+    loop = deck._loop
+    idle = None  # set once every event has been injected
+
+    def finish(sent):
+        latency = time.perf_counter() - sent
+        stats.dispatch_latencies.append(latency)
+        stats.dispatched += 1
+        stats.slow_dispatch += latency > budget
+        settle()
+
+    def settle():
+        stats._in_flight -= 1
+        if not stats._in_flight and idle is not None and not idle.done():
+            idle.set_result(None)
+
+    def cb_dispatched(fut, sent):
+        try:
+            results = fut.result()
+        except Exception as e:
+            logger.debug("replayed event failed: %s", e)
+            stats.dropped += 1
+            settle()
+            return
+
+        tasks = [task for _, task in results if asyncio.isfuture(task)]
+        if not tasks:
+            finish(sent)
+            return
+
+        waiting = [len(tasks)]
+
+        def cb_task_done(task):
+            waiting[0] -= 1
+            if not waiting[0]:
+                finish(sent)
+
+        for task in tasks:
+            task.add_done_callback(cb_task_done)
+
+    set_key_image = device.set_key_image
+
+    def set_key_image_timed(key, image):
+        set_key_image(key, image)
+        stats._written(key)
+
+    # NOTE an instance attribute, shadows the method until we delete it
+    device.set_key_image = set_key_image_timed
+
+    try:
+        start = time.perf_counter()
+
+        for offset, key, pressed in events:
+            if speed:
+                due = start + offset / speed
+                delay = due - time.perf_counter()
+
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                elif -delay > budget:
+                    stats.behind += 1
+            else:
+                await asyncio.sleep(0)
+
+            if key >= device.key_count():
+                stats.dropped += 1
+                continue
+
+            stats.events += 1
+            futures = len(deck._futures)
+            sent = time.perf_counter()
+
+            stats._inject(key, sent)
+            device.press(key, pressed)
+
+            if len(deck._futures) == futures:
+                # key callback was swapped out or the key didn't change
+                stats._uninject(key)
+                stats.dropped += 1
+                continue
+
+            stats._in_flight += 1
+            stats.in_flight = max(stats.in_flight, stats._in_flight)
+
+            # NOTE called from whichever thread finishes the future
+            deck._futures[-1].add_done_callback(
+                lambda fut, sent=sent: loop.call_soon_threadsafe(cb_dispatched, fut, sent)
+            )
+
+        if stats._in_flight:
+            idle = loop.create_future()
+
+            try:
+                await asyncio.wait_for(idle, timeout)
+            except asyncio.TimeoutError:
+                stats.dropped += stats._in_flight
+
+        stats.elapsed = time.perf_counter() - start
+    finally:
+        del device.set_key_image
+
+    stats._finish()
+
+    return stats
@@ -5,6 +5,22 @@ from PIL import Image, ImageOps, ImageDraw, ImageFont
 from StreamDeck.ImageHelpers import PILHelper
 
 ASSET_PATH = pathlib.Path(__file__).parent / 'assets'
+LABEL_FONT = ASSET_PATH / 'Roboto-Regular.ttf'
+
+# PILHelper.to_native_format() returned BytesIO.getbuffer() before
+# streamdeck 0.9.5, bytes since
+NATIVE_TYPES = (memoryview, bytes, bytearray)
+
+def device_of(deck):
+    """
+    accept either a streamdeckui.Deck or a raw StreamDeck device
+    """
+    from .deck import Deck
+
+    if isinstance(deck, Deck):
+        return deck._deck
+
+    return deck
 
 def resize_image(deck, key_spacing, image):
     """
@@ -13,10 +29,7 @@ def resize_image(deck, key_spacing, image):
 
     image: whatever Pillow.Image.open() can handle
     """
-    from .deck import Deck
-
-    if isinstance(deck, Deck):
-        deck = deck._deck
+    deck = device_of(deck)
 
     # TODO handle subset of deck keys
     key_rows, key_cols = deck.key_layout()
@@ -84,22 +97,25 @@ def render_key_image(deck, image):
     if image is None:
         return solid_image(deck)
 
-    if isinstance(image, memoryview):
+    if isinstance(image, NATIVE_TYPES):
         return image
 
+    deck = device_of(deck)
+
     image = Image.open(image)
-    image = PILHelper.create_scaled_image(deck._deck, image, margins=[5, ] * 4)
-    return PILHelper.to_native_format(deck._deck, image)
+    image = PILHelper.create_scaled_image(deck, image, margins=[5, ] * 4)
+    return PILHelper.to_native_format(deck, image)
 
 def add_text(deck, image, text, font=None, color='white'):
+    deck = device_of(deck)
 
     if not text:
-        return PILHelper.to_native_format(deck._deck, image)
+        return PILHelper.to_native_format(deck, image)
 
     image = from_native(deck, image)
 
     if font is None:
-        font = str(ASSET_PATH / 'Roboto-Regular.ttf')
+        font = str(LABEL_FONT)
 
     font = ImageFont.truetype(font, 14)
     pos = (
@@ -113,21 +129,20 @@ def add_text(deck, image, text, font=None, color='white'):
         anchor="ms", fill=color
     )
 
-    return PILHelper.to_native_format(deck._deck, image)
+    return PILHelper.to_native_format(deck, image)
 
 def solid_image(deck, color='black'):
-    image = PILHelper.create_image(deck._deck, color)
-    return PILHelper.to_native_format(deck._deck, image)
+    deck = device_of(deck)
+    image = PILHelper.create_image(deck, color)
+    return PILHelper.to_native_format(deck, image)
 
 def from_native(deck, image):
 
-    # covert BytesIO.getbuffer() back into something PIL can use
-    if not isinstance(image, memoryview):
+    # covert a native image back into something PIL can use
+    if not isinstance(image, NATIVE_TYPES):
         return image
 
-    from .deck import Deck
-    if isinstance(deck, Deck):
-        deck = deck._deck
+    deck = device_of(deck)
 
     image = io.BytesIO(image)
     image = Image.open(image)
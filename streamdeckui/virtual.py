@@ -0,0 +1,197 @@
+import pathlib
+
+from .page import Page
+from .key import Key
+from .utils import render_key_image, add_text
+
+import logging
+logger = logging.getLogger(__name__)
+
+class SlotKey(Key):
+    """
+    a recycled key of a VirtualPage, shows whichever item is scrolled into
+    its slot
+    """
+    __slots__ = ('item',)
+
+    def __init__(self, page, **kw):
+        self.item = None  # index into page.source
+        super().__init__(page, **kw)
+
+    async def cb_key_up(self, *args, **kw):
+        self.state = Key.UP
+
+        if self.item is not None:
+            await self.page.cb_select(self.page.source[self.item])
+
+
+class ScrollKey(Key):
+    __slots__ = ('step',)
+
+    def __init__(self, page, step, **kw):
+        self.step = step
+        super().__init__(page, **kw)
+
+    async def cb_key_up(self, *args, **kw):
+        self.state = Key.UP
+        self.page.scroll(self.step)
+
+
+class VirtualPage(Page):
+    """
+    a scrollable page over a long list of items, eg. thousands of hosts
+
+    source:   anything with len() and [] (a list works fine)
+    renderer: called as renderer(item) and returns an image (anything
+              Key.set_image accepts) or an (image, label) tuple
+    on_select: optional async callback, or override cb_select()
+
+    the last two keys scroll back/forward by `step` items (default one row).
+    Only items in the visible window are rendered up front, `prefetch` rows
+    either side are rendered in the background. Rendered images are kept
+    per item while within that margin so scrolling back and forth is cheap
+    and only slots whose image actually changed are sent to the device.
+    """
+
+    prefetch = 1  # rows
+
+    def __init__(self, deck, source, renderer, on_select=None, step=None, prefetch=None):
+        super().__init__(deck, [])
+
+        self.source = source
+        self._renderer = renderer
+        self._on_select = on_select
+
+        rows, cols = self.device.key_layout()
+        self.step = step or cols
+        self.prefetch = VirtualPage.prefetch if prefetch is None else prefetch
+        self._margin = self.prefetch * cols
+
+        count = self.device.key_count()
+
+        self._keys = [SlotKey(self) for _ in range(count - 2)]
+        self._keys.append(ScrollKey(self, -self.step, label='<'))
+        self._keys.append(ScrollKey(self, self.step, label='>'))
+
+        self.offset = 0
+        self._cache = {}  # item index -> image id, we hold a reference
+        self._blank = self.deck.images.render(None)
+        self._prefetch_handle = None
+
+        self.fill()
+
+    @property
+    def slots(self):
+        return self._keys[:-2]
+
+    async def cb_select(self, item):
+        if self._on_select is not None:
+            await self._on_select(item)
+
+    def render(self, index):
+        """
+        return the image id for source[index], rendering on a cache miss
+        """
+        image_id = self._cache.get(index)
+        if image_id is not None:
+            return image_id
+
+        image = self._renderer(self.source[index])
+        label = ''
+
+        if isinstance(image, tuple):
+            image, label = image
+
+        if isinstance(image, pathlib.PurePath):
+            image = str(image)
+
+        if label:
+            image = add_text(self.deck, render_key_image(self.deck, image), label)
+            image_id = self.deck.images.acquire(image)
+        else:
+            # icons shared between items are only rendered once
+            image_id = self.deck.images.render(image)
+
+        self._cache[index] = image_id
+        return image_id
+
+    def scroll(self, delta):
+        last = max(0, len(self.source) - len(self.slots))
+        offset = min(max(self.offset + delta, 0), last)
+
+        if offset == self.offset:
+            return
+
+        self.offset = offset
+        self.fill()
+
+    def refresh(self):
+        """
+        call after source changed, re-renders everything
+        """
+        for image_id in self._cache.values():
+            self.deck.images.release(image_id)
+
+        self._cache = {}
+        self.offset = min(self.offset, max(0, len(self.source) - len(self.slots)))
+        self.fill()
+
+    def fill(self):
+        """
+        assign items to slots and push the slots that changed
+        """
+        active = self.deck.page is self
+
+        for slot, key in enumerate(self.slots):
+            index = self.offset + slot
+
+            if index < len(self.source):
+                item, image_id = index, self.render(index)
+            else:
+                item, image_id = None, self._blank
+
+            key.item = item
+
+            if key.image_id(Key.UP) == image_id:
+                continue
+
+            key.set_image_id(Key.UP, image_id)
+
+            if active and key.state == Key.UP:
+                key.show_image(Key.UP)
+
+        self._evict()
+
+        if self._prefetch_handle is not None:
+            self._prefetch_handle.cancel()
+
+        self._prefetch_handle = self.deck._loop.call_soon(self._prefetch)
+
+    def _window(self):
+        start = max(0, self.offset - self._margin)
+        end = min(len(self.source), self.offset + len(self.slots) + self._margin)
+        return start, end
+
+    def _evict(self):
+        start, end = self._window()
+
+        for index in list(self._cache):
+            if not start <= index < end:
+                self.deck.images.release(self._cache.pop(index))
+
+    def _prefetch(self):
+        """
+        render one missing item in the margin then yield to the loop
+        """
+        self._prefetch_handle = None
+
+        if self.device is None:
+            return  # deck was released
+
+        start, end = self._window()
+
+        for index in range(start, end):
+            if index not in self._cache:
+                self.render(index)
+                self._prefetch_handle = self.deck._loop.call_soon(self._prefetch)
+                return
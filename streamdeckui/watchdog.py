@@ -0,0 +1,202 @@
+import sys
+import time
+import bisect
+import threading
+import traceback
+
+import logging
+logger = logging.getLogger(__name__)
+
+class Watchdog:
+    """
+    detect event loop iterations that block for longer than `threshold`
+    seconds. eg. a slow Pillow call or a blocking handler in a key callback
+
+    the loop bumps a heartbeat every `interval` seconds and a helper thread
+    watches that heartbeat. If the heartbeat goes stale the helper thread
+    grabs a stack sample of the loop thread and blames the innermost
+    Key/Page/Periodic/Timers callback it can find on the stack.
+
+    once the loop recovers the stall duration is counted and put into a
+    histogram, see stats()
+    """
+
+    threshold = .25
+    log_interval = 10  # at most one stall logged per this many seconds
+
+    # upper bounds of the stall histogram buckets, in seconds
+    buckets = (.1, .25, .5, 1, 2.5, 5, 10)
+
+    def __init__(self, loop, threshold=None, log_interval=None):
+        self._loop = loop
+
+        self.threshold    = threshold or Watchdog.threshold
+        self.log_interval = log_interval or Watchdog.log_interval
+        self.interval     = self.threshold / 4
+
+        self.is_started = False
+        self._thread    = None
+        self._handle    = None
+        self._stop      = threading.Event()
+
+        self._loop_thread = None
+        self._last_beat   = None
+        self._sample      = None   # (culprit, stack) captured by the helper thread
+        self._last_log    = None
+
+        self.stalls     = 0
+        self.suppressed = 0   # stalls not logged due to rate limiting
+        self.longest    = 0
+        self.histogram  = [0] * (len(self.buckets) + 1)
+
+    def start(self):
+        if self.is_started:
+            return
+
+        self.is_started = True
+        self._stop.clear()
+
+        # NOTE forget the last run, time spent stopped isn't a stall
+        self._last_beat = None
+        self._sample = None
+
+        self._handle = self._loop.call_soon(self._beat)
+
+        self._thread = threading.Thread(
+            target=self._watch,
+            name='streamdeckui-watchdog',
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        if not self.is_started:
+            return
+
+        self.is_started = False
+        self._stop.set()
+
+        if self._handle:
+            self._handle.cancel()
+
+        self._thread.join()
+        self._thread = None
+
+    def stats(self):
+        """
+        return counters and the stall histogram, histogram keys are the
+        bucket upper bound (None for the overflow bucket)
+        """
+        bounds = list(self.buckets) + [None]
+
+        return {
+            'stalls': self.stalls,
+            'suppressed': self.suppressed,
+            'longest': self.longest,
+            'histogram': dict(zip(bounds, self.histogram)),
+        }
+
+    def _beat(self):
+        # NOTE we're in the loop thread
+        now = time.monotonic()
+
+        if self._loop_thread is None:
+            self._loop_thread = threading.get_ident()
+
+        if self._last_beat is not None:
+            stalled = now - self._last_beat - self.interval
+
+            if stalled >= self.threshold:
+                self._record(stalled)
+
+        self._last_beat = now
+        self._handle = self._loop.call_later(self.interval, self._beat)
+
+    def _watch(self):
+        # NOTE we're in the watchdog thread, not the loop
+        while not self._stop.wait(self.interval):
+            last_beat = self._last_beat
+
+            if last_beat is None or self._sample is not None:
+                continue
+
+            if time.monotonic() - last_beat - self.interval >= self.threshold:
+                # NOTE an exception would end the thread, and with it all
+                # sampling, without a word
+                try:
+                    self._sample = self._capture()
+                except Exception:
+                    logger.exception("watchdog failed to sample the event loop")
+
+    def _capture(self):
+        frame = sys._current_frames().get(self._loop_thread)
+
+        if frame is None:
+            return None, []
+
+        try:
+            who = culprit(frame)
+        except Exception as e:
+            logger.debug("watchdog couldn't name the culprit: %r", e)
+            who = None
+
+        return who, traceback.format_stack(frame)
+
+    def _record(self, stalled):
+        self.stalls += 1
+        self.longest = max(self.longest, stalled)
+        self.histogram[bisect.bisect_left(self.buckets, stalled)] += 1
+
+        sample, self._sample = self._sample, None
+
+        now = time.monotonic()
+        if self._last_log is not None and now - self._last_log < self.log_interval:
+            self.suppressed += 1
+            return
+
+        self._last_log = now
+
+        if sample is None:
+            logger.warning("event loop blocked for %.3fs", stalled)
+            return
+
+        who, stack = sample
+        logger.warning(
+            "event loop blocked for %.3fs in %s (%d similar suppressed)\n%s",
+            stalled, who or 'unknown', self.suppressed, ''.join(stack)
+        )
+        self.suppressed = 0
+
+
+def culprit(frame):
+    """
+    walk the stack from the innermost frame outwards and return a description
+    of the first Key, Page, Periodic or Timers method found
+    """
+    from .key import Key
+    from .page import Page
+    from .periodic import Periodic
+    from .timers import Timers
+
+    owners = (Key, Page, Periodic, Timers)
+
+    while frame is not None:
+        owner = frame.f_locals.get('self')
+
+        if isinstance(owner, owners):
+            if isinstance(owner, Periodic):
+                func = owner.func[0]
+                name = getattr(func, '__qualname__', repr(func))
+                return f"{owner.__class__.__name__}({name})"
+
+            try:
+                name = str(owner)
+            except Exception:
+                # eg. a Key whose page is gone can't look up its index
+                name = owner.__class__.__name__
+
+            return f"{name}.{frame.f_code.co_name}"
+
+        frame = frame.f_back
+
+    return None
@@ -0,0 +1,142 @@
+import math
+
+import logging
+logger = logging.getLogger(__name__)
+
+class WheelTimer:
+    """
+    handle returned by TimerWheel.call_later(), like an asyncio.TimerHandle
+    """
+    __slots__ = ('wheel', 'deadline', 'callback', 'args', 'cancelled')
+
+    def __init__(self, wheel, deadline, callback, args):
+        self.wheel     = wheel
+        self.deadline  = deadline
+        self.callback  = callback
+        self.args      = args
+        self.cancelled = False
+
+    def cancel(self):
+        if not self.cancelled:
+            self.cancelled = True
+            self.wheel._pending -= 1
+
+
+class TimerWheel:
+    """
+    a hierarchical timer wheel, one per Deck, so that lots of short lived
+    timers (long press, double tap, repeat) don't each create and cancel
+    their own call_later() handle
+
+    timers fire at most `resolution` seconds late. The wheel only ticks
+    while it has pending timers so an idle deck doesn't wake the cpu.
+    """
+
+    bits   = 6
+    slots  = 1 << bits  # per level
+    levels = 4          # 64**4 ticks, ~46h at the default resolution
+
+    resolution = .01
+
+    def __init__(self, clock, resolution=None):
+        self._clock = clock
+        self.resolution = resolution or TimerWheel.resolution
+
+        self._wheel = [
+            [[] for _ in range(self.slots)]
+            for _ in range(self.levels)
+        ]
+
+        self._now     = 0     # ticks processed so far
+        self._origin  = None  # loop time of tick 0
+        self._handle  = None
+        self._pending = 0
+
+    def __len__(self):
+        return self._pending
+
+    def call_later(self, delay, callback, *args):
+        now = self._clock.time()
+
+        if self._handle is None:
+            # (re)start ticking, time stood still while we were idle
+            self._origin = now - self._now * self.resolution
+
+        # NOTE count from the clock, not self._now, which can be up to a tick
+        # behind it. The epsilon matches the one in _tick()
+        deadline = math.ceil((now + delay - self._origin) / self.resolution - 1e-6)
+        deadline = min(max(deadline, self._now + 1), self._now + self.slots ** self.levels - 1)
+
+        timer = WheelTimer(self, deadline, callback, args)
+        self._insert(timer)
+        self._pending += 1
+
+        if self._handle is None:
+            self._schedule()
+
+        return timer
+
+    def _insert(self, timer):
+        delta = timer.deadline - self._now
+
+        for level in range(self.levels):
+            if delta < 1 << (self.bits * (level + 1)) or level == self.levels - 1:
+                slot = (timer.deadline >> (self.bits * level)) & (self.slots - 1)
+                self._wheel[level][slot].append(timer)
+                return
+
+    def _schedule(self):
+        when = self._origin + (self._now + 1) * self.resolution
+        self._handle = self._clock.call_at(when, self._tick)
+
+    def _tick(self):
+        # NOTE the epsilon stops float error leaving us a tick short forever
+        target = int((self._clock.time() - self._origin) / self.resolution + 1e-6)
+
+        while self._now < target and self._pending:
+            self._now += 1
+            self._cascade()
+            self._expire()
+
+        if self._pending:
+            self._schedule()
+        else:
+            self._handle = None
+
+    def _cascade(self):
+        """
+        when a lower level wraps around, move the timers from the next slot
+        of the level above down to where they now belong
+        """
+        for level in range(1, self.levels):
+            if self._now & ((1 << (self.bits * level)) - 1):
+                break
+
+            slot = (self._now >> (self.bits * level)) & (self.slots - 1)
+            timers = self._wheel[level][slot]
+            self._wheel[level][slot] = []
+
+            for timer in timers:
+                if not timer.cancelled:
+                    self._insert(timer)
+
+    def _expire(self):
+        slot = self._now & (self.slots - 1)
+        timers = self._wheel[0][slot]
+        self._wheel[0][slot] = []
+
+        for timer in timers:
+            if timer.cancelled:
+                continue
+
+            if timer.deadline > self._now:
+                # max delay timers can lap the top level
+                self._insert(timer)
+                continue
+
+            timer.cancel()  # mark as done
+
+            try:
+                timer.callback(*timer.args)
+            except Exception as e:
+                logger.exception(e)
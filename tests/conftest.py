@@ -0,0 +1,42 @@
+import asyncio
+import inspect
+
+import blinker
+import pytest
+
+from streamdeckui import Deck
+from streamdeckui.fake import FakeDevice
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    """
+    run `async def test_...` functions in a fresh event loop
+    """
+    if not inspect.iscoroutinefunction(pyfuncitem.obj):
+        return None
+
+    kw = {
+        name: pyfuncitem.funcargs[name]
+        for name in pyfuncitem._fixtureinfo.argnames
+    }
+
+    asyncio.run(pyfuncitem.obj(**kw))
+    return True
+
+@pytest.fixture(autouse=True)
+def signals():
+    yield
+
+    # NOTE Deck's signals are global, don't leak receivers between tests
+    for name in ('key_up', 'key_down', 'page_in', 'page_out'):
+        blinker.signal(name).receivers.clear()
+
+@pytest.fixture
+def make_deck():
+    """
+    call from inside a test coroutine: deck = make_deck(FakeDevice(), clock=...)
+    """
+    def make(device=None, **kw):
+        return Deck(device or FakeDevice(), loop=asyncio.get_running_loop(), **kw)
+
+    return make
@@ -0,0 +1,177 @@
+import os
+import time
+import asyncio
+
+import pytest
+from PIL import Image
+
+from streamdeckui import Page, Key
+from streamdeckui import assets
+from streamdeckui.assets import Inotify
+from streamdeckui.clock import VirtualClock
+from streamdeckui.utils import ASSET_PATH, render_key_image
+
+def write_icon(path, color):
+    Image.new('RGB', (72, 72), color).save(path)
+
+    # NOTE same size file, make sure polling sees a new mtime
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+async def until(condition, timeout=2):
+    """
+    renders happen in a real worker thread, give them real time
+    """
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        await asyncio.sleep(.01)
+
+    return condition()
+
+@pytest.fixture
+def polling(monkeypatch):
+    def no_inotify():
+        raise OSError("no inotify in this test")
+
+    monkeypatch.setattr(assets, 'Inotify', no_inotify)
+
+async def setup(make_deck, tmp_path, poll=1):
+    clock = VirtualClock(asyncio.get_running_loop())
+    deck = make_deck(clock=clock)
+    watcher = deck.watch_assets(poll=poll)
+
+    icon = str(tmp_path / 'icon.png')
+    write_icon(icon, 'red')
+
+    main = Page(deck, None)
+    main.keys[0].set_image(Key.UP, icon)
+
+    other = Page(deck, None)
+    other.keys[0].set_image(Key.UP, icon)
+
+    deck.add_page('main', main)
+    deck.add_page('other', other)
+    deck.change_page('main')
+    await clock.run_for(0)
+
+    return deck, clock, watcher, icon
+
+async def test_inotify_parsing(tmp_path):
+    try:
+        inotify = Inotify()
+    except OSError:
+        pytest.skip("no inotify")
+
+    # NOTE swap the kernel's fd for a pipe we can write raw events into
+    os.close(inotify.fd)
+    inotify.fd, write = os.pipe()
+    os.set_blocking(inotify.fd, False)
+    inotify._dirs = {1: '/icons', 2: '/fonts'}
+
+    def event(wd, name, size):
+        name = name.encode().ljust(size, b'\0')
+        return Inotify.EVENT.pack(wd, Inotify.IN_CLOSE_WRITE, 0, len(name)) + name
+
+    os.write(write, b''.join([
+        event(1, 'a.png', 16),
+        event(2, 'label.ttf', 32),
+        event(1, '', 0),           # the directory itself
+        event(9, 'gone.png', 16),  # not one of ours
+    ]))
+
+    assert inotify.read() == {'/icons/a.png', '/fonts/label.ttf'}
+    assert inotify.read() == set()
+
+    os.close(write)
+    inotify.close()
+
+async def test_inotify_sees_writes(tmp_path):
+    try:
+        inotify = Inotify()
+    except OSError:
+        pytest.skip("no inotify")
+
+    inotify.watch(str(tmp_path))
+    write_icon(tmp_path / 'a.png', 'red')
+
+    assert str(tmp_path / 'a.png') in inotify.read()
+    inotify.close()
+
+async def test_poll_rerenders_active_page_only(make_deck, tmp_path, polling):
+    deck, clock, watcher, icon = await setup(make_deck, tmp_path)
+    device = deck._deck
+    main, other = deck._pages['main'], deck._pages['other']
+    writes = device.key_writes
+
+    write_icon(icon, 'blue')
+    blue = render_key_image(deck, icon)
+
+    # the poll notices, then waits `settle` for the writes to stop
+    await clock.run_for(1)
+    assert device.key_writes == writes
+
+    await clock.run_for(watcher.settle)
+    assert await until(lambda: device.key_writes > writes)
+
+    assert main.keys[0].image(Key.UP) == blue
+    assert other.keys[0].image(Key.UP) == blue
+    assert device.images[0] == blue
+
+    # the other page's key wasn't sent, it's not showing
+    assert device.key_writes == writes + 1
+
+    await deck.release()
+
+async def test_debounce(make_deck, tmp_path, polling):
+    deck, clock, watcher, icon = await setup(make_deck, tmp_path, poll=3600)
+    reloads = []
+
+    async def reload(paths):
+        reloads.append(paths)
+
+    watcher.reload = reload
+    full = os.path.abspath(icon)
+
+    for _ in range(5):
+        watcher._touched({full})
+        await clock.run_for(watcher.settle / 2)
+
+    assert reloads == []
+
+    await clock.run_for(watcher.settle)
+    assert reloads == [{icon}]
+
+    await deck.release()
+
+async def test_shared_source_rendered_once(make_deck, tmp_path, polling, monkeypatch):
+    deck, clock, watcher, icon = await setup(make_deck, tmp_path, poll=3600)
+    device = deck._deck
+
+    renders = []
+    def counting(deck, image):
+        renders.append(image)
+        return render_key_image(deck, image)
+
+    monkeypatch.setattr(assets, 'render_key_image', counting)
+
+    # every key on both pages shows the default pressed.png when down
+    pressed = str(ASSET_PATH / 'pressed.png')
+    keys = [key for page in deck._pages.values() for key in page.keys]
+    assert len(keys) == device.key_count() * 2
+
+    image_id = keys[0].image_id(Key.DOWN)
+    refs = deck.images._refs[image_id]
+
+    watcher._touched({os.path.abspath(pressed)})
+    await clock.run_for(watcher.settle)
+    assert await until(lambda: renders)
+    await asyncio.sleep(.05)
+
+    assert renders == [pressed]
+
+    # same file, same image, every key still shares it. The render cache
+    # let go of its reference, nothing leaked
+    assert {key.image_id(Key.DOWN) for key in keys} == {image_id}
+    assert deck.images._refs[image_id] == refs - 1
+
+    await deck.release()
@@ -0,0 +1,77 @@
+import os
+import asyncio
+
+import pytest
+from PIL import UnidentifiedImageError
+
+from streamdeckui.fake import FakeDevice
+
+def make_spec(tmp_path, pages=3, broken=None):
+    """
+    with broken, that page's first key has an icon PIL can't open
+    """
+    lines = ['start: p0', 'pages:']
+    (tmp_path / 'empty.png').write_bytes(b'')
+
+    for p in range(pages):
+        lines.append(f"  p{p}:")
+        lines.append("    keys:")
+        for k in range(4):
+            icon = ", icon: empty.png" if p == broken and k == 0 else ""
+            lines.append(f"      {k}: {{label: 'P{p} K{k}', color: '#20{p % 10}060', link: p{(p + 1) % pages}{icon}}}")
+
+    path = tmp_path / 'deck.yaml'
+    path.write_text('\n'.join(lines))
+    return str(path)
+
+async def test_serial_build(make_deck, tmp_path):
+    deck = make_deck(FakeDevice())
+    report = await deck.build(make_spec(tmp_path), workers=1)
+
+    assert deck.page is deck._pages['p0']
+    assert set(deck._pages) == {'p0', 'p1', 'p2'}
+    assert report.jobs > 0
+    assert report.render_cpu > 0
+    assert 0 < report.first_page <= report.wall
+
+    # nothing to compare with
+    assert report.speedup is None
+    assert 'speedup' not in str(report)
+
+    await deck.release()
+
+@pytest.mark.parametrize('workers', [1, 2])
+async def test_speedup_is_wall_over_wall(make_deck, tmp_path, workers):
+    spec = make_spec(tmp_path)
+    deck = make_deck(FakeDevice())
+
+    serial = await deck.build(spec, workers=1)
+    report = await deck.build(spec, workers=workers, baseline=serial)
+
+    assert report.jobs == serial.jobs
+    assert report.speedup == pytest.approx(serial.wall / report.wall)
+    assert f"speedup {report.speedup:.1f}x" in str(report)
+
+    await deck.release()
+
+def segments():
+    return set(os.listdir('/dev/shm')) if os.path.isdir('/dev/shm') else set()
+
+@pytest.mark.parametrize('workers', [1, 2])
+async def test_failed_render_cleans_up(make_deck, tmp_path, workers):
+    spec = make_spec(tmp_path, pages=12, broken=1)
+    deck = make_deck(FakeDevice())
+    before = segments()
+
+    with pytest.raises(UnidentifiedImageError):
+        await deck.build(spec, workers=workers, batch=1)
+
+    # batches that were already running still finish, then get unlinked
+    for _ in range(100):
+        if segments() <= before:
+            break
+        await asyncio.sleep(.05)
+
+    assert segments() <= before
+
+    await deck.release()
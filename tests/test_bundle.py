@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from streamdeckui.fake import FakeDevice
+from streamdeckui.bundle import Compiler, compile_bundle, bundle_path, previous_bundle
+
+def write_spec(tmp_path, pages, start=None):
+    spec = tmp_path / 'deck.json'
+    spec.write_text(json.dumps({'start': start, 'pages': pages} if start else {'pages': pages}))
+    return spec
+
+def labelled(labels, link=None):
+    return {'keys': {str(i): {'label': label, 'link': link} for i, label in enumerate(labels)}}
+
+def recompile(spec, out, device):
+    """
+    compile like compile_bundle() does but hand back the Compiler for its counts
+    """
+    path = bundle_path(out, device)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    compiler = Compiler(spec, device, previous_bundle(path))
+    compiler.compile().write(path)
+
+    return compiler
+
+async def test_links_checked(tmp_path):
+    device = FakeDevice()
+
+    spec = write_spec(tmp_path, {
+        'main': {'keys': {'0': {'link': 'other'}, '1': {'link': 'back'}, '2': {'link': 'quit'}}},
+        'other': {},
+    })
+    compile_bundle(spec, tmp_path / 'out', device)
+
+    spec = write_spec(tmp_path, {
+        'main': {'keys': {'3': {'label': 'Lights', 'link': 'lihgts'}}},
+        'lights': {},
+    })
+    with pytest.raises(ValueError, match='main key 3 links to no such page: lihgts'):
+        compile_bundle(spec, tmp_path / 'out', device)
+
+    spec = write_spec(tmp_path, {'main': {}}, start='nope')
+    with pytest.raises(ValueError, match='no such start page'):
+        compile_bundle(spec, tmp_path / 'out', device)
+
+async def test_recompile_is_incremental(tmp_path):
+    device = FakeDevice()
+    out = tmp_path / 'out'
+    labels = [f"key {i}" for i in range(5)]
+
+    spec = write_spec(tmp_path, {'main': labelled(labels)})
+    first = recompile(spec, out, device)
+
+    # 5 labelled keys, the plain black key and the shared pressed.png
+    assert first.rendered == 7
+    assert first.reused == 0
+
+    unchanged = recompile(spec, out, device)
+    assert unchanged.rendered == 0
+    assert unchanged.reused == 7
+
+    labels[2] = 'changed'
+    spec = write_spec(tmp_path, {'main': labelled(labels)})
+    changed = recompile(spec, out, device)
+
+    assert changed.rendered == 1
+    assert changed.reused == 6
@@ -0,0 +1,157 @@
+import asyncio
+
+from streamdeckui import Page, Key, GestureKeyMixin
+from streamdeckui.clock import VirtualClock
+
+RESOLUTION = .01
+
+class GestureKey(GestureKeyMixin, Key):
+    def __init__(self, page, events, **kw):
+        super().__init__(page, **kw)
+        self.events = events
+
+    async def cb_press(self):
+        self.events.append(('press', self.deck.clock.time()))
+
+    async def cb_double_tap(self):
+        self.events.append(('double_tap', self.deck.clock.time()))
+
+    async def cb_long_press(self):
+        self.events.append(('long_press', self.deck.clock.time()))
+
+    async def cb_repeat(self):
+        self.events.append(('repeat', self.deck.clock.time()))
+
+    async def cb_release(self):
+        self.events.append(('release', self.deck.clock.time()))
+
+
+async def setup(make_deck, key_class=GestureKey):
+    clock = VirtualClock(asyncio.get_running_loop())
+    deck = make_deck(clock=clock, gesture_resolution=RESOLUTION)
+
+    events = []
+    page = Page(deck, [])
+    page._keys = [key_class(page, events) for _ in range(deck._deck.key_count())]
+
+    deck.add_page('main', page)
+    deck.change_page('main')
+    await clock.run_for(0)
+
+    return deck, clock, events
+
+async def tap(deck, clock, key, hold=.05):
+    deck._deck.press(key, True)
+    await clock.run_for(hold)
+    deck._deck.press(key, False)
+
+def names(events):
+    return [name for name, _ in events]
+
+async def test_press_waits_for_double_tap(make_deck):
+    deck, clock, events = await setup(make_deck)
+
+    await tap(deck, clock, 0)
+    released = clock.time()
+    await clock.run_for(1)
+
+    assert names(events) == ['press']
+
+    when = events[0][1]
+    assert released + GestureKey.double_tap_time <= when
+    assert when <= released + GestureKey.double_tap_time + RESOLUTION
+
+    await deck.release()
+
+async def test_double_tap(make_deck):
+    deck, clock, events = await setup(make_deck)
+
+    await tap(deck, clock, 0)
+    await clock.run_for(.1)
+    await tap(deck, clock, 0)
+    await clock.run_for(1)
+
+    assert names(events) == ['double_tap']
+
+    await deck.release()
+
+async def test_long_press_and_repeat(make_deck):
+    deck, clock, events = await setup(make_deck)
+
+    deck._deck.press(0, True)
+    pressed = clock.time()
+    await clock.run_for(.85)
+    deck._deck.press(0, False)
+    await clock.run_for(1)
+
+    assert names(events) == ['long_press', 'repeat', 'repeat', 'repeat', 'release']
+
+    long_press = events[0][1]
+    assert pressed + GestureKey.long_press_time <= long_press
+    assert long_press <= pressed + GestureKey.long_press_time + RESOLUTION
+
+    # every repeat is at least repeat_time after the last one
+    for (_, a), (_, b) in zip(events, events[1:4]):
+        assert b - a >= GestureKey.repeat_time - 1e-9
+
+    await deck.release()
+
+
+class NavigateKey(GestureKey):
+    async def cb_long_press(self):
+        self.deck.change_page('other')
+        await asyncio.sleep(0)
+        self.events.append(('navigated', None))
+
+
+async def test_gesture_survives_its_own_page_change(make_deck):
+    deck, clock, events = await setup(make_deck, NavigateKey)
+    deck.add_page('other', Page(deck, None))
+
+    deck._deck.press(0, True)
+    await clock.run_for(.6)
+
+    assert deck.page is deck._pages['other']
+    assert ('navigated', None) in events
+
+    # the release goes to the other page's key, ours must stop repeating
+    deck._deck.press(0, False)
+    events.clear()
+    await clock.run_for(10)
+
+    assert events == []
+    assert not len(deck.timer_wheel)
+
+    await deck.release()
+
+async def test_release_pressed_on_another_page(make_deck):
+    deck, clock, events = await setup(make_deck)
+
+    deck.add_page('other', Page(deck, None))
+    deck.change_page('other')
+    await clock.run_for(0)
+
+    deck._deck.press(0, True)
+    await clock.run_for(.1)
+    deck.change_page('main')
+    await clock.run_for(0)
+    deck._deck.press(0, False)
+    await clock.run_for(1)
+
+    # never saw the press, nothing to finish
+    assert events == []
+
+    await deck.release()
+
+async def test_pending_tap_fires_on_page_out(make_deck):
+    deck, clock, events = await setup(make_deck)
+    deck.add_page('other', Page(deck, None))
+
+    await tap(deck, clock, 0)
+    await clock.run_for(.1)
+    deck.change_page('other')
+    await clock.run_for(1)
+
+    assert names(events) == ['press']
+
+    await deck.release()
@@ -0,0 +1,60 @@
+import os
+
+from PIL import Image
+
+from streamdeckui import Page, Key
+from streamdeckui.utils import solid_image
+
+def write_png(path, color, mtime):
+    Image.new('RGB', (32, 32), color).save(path)
+    os.utime(path, ns=(mtime, mtime))
+
+async def test_dedup_and_refcount(make_deck):
+    deck = make_deck()
+    images = deck.images
+
+    red = solid_image(deck, 'red')
+    a = images.acquire(red)
+    b = images.acquire(bytes(red))
+
+    assert a == b
+    images.release(a)
+    assert images[a] == red
+
+    images.release(b)
+    assert images.acquire(solid_image(deck, 'blue')) == a  # id reused
+
+    await deck.release()
+
+async def test_path_rendered_once(make_deck, tmp_path):
+    deck = make_deck()
+    path = tmp_path / 'icon.png'
+    write_png(path, 'red', 1_000_000_000)
+
+    page = Page(deck, None)
+    for key in page.keys:
+        key.set_image(Key.UP, path)
+
+    assert len({key.image_id(Key.UP) for key in page.keys}) == 1
+
+    await deck.release()
+
+async def test_changed_file_rendered_again(make_deck, tmp_path):
+    deck = make_deck()
+    path = tmp_path / 'icon.png'
+    write_png(path, 'red', 1_000_000_000)
+
+    page = Page(deck, None)
+    key = page.keys[0]
+
+    key.set_image(Key.UP, path)
+    before = bytes(key.image(Key.UP))
+
+    write_png(path, 'blue', 2_000_000_000)
+    page.keys[1].set_image(Key.UP, path)
+    key.set_image(Key.UP, str(path))
+
+    assert bytes(key.image(Key.UP)) != before
+    assert key.image_id(Key.UP) == page.keys[1].image_id(Key.UP)
+
+    await deck.release()
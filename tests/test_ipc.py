@@ -0,0 +1,138 @@
+import asyncio
+
+import pytest
+
+from streamdeckui import Page, Key
+from streamdeckui.ipc import IPCClient, encode_message, read_message
+from streamdeckui.utils import solid_image
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'deck.sock')
+
+async def serve(make_deck, path):
+    deck = make_deck()
+    deck.add_page('main', Page(deck, None))
+    deck.add_page('other', Page(deck, None))
+    deck.change_page('main')
+
+    await deck.serve(path)
+    return deck
+
+async def raw_request(path, msg):
+    reader, writer = await asyncio.open_unix_connection(path)
+    writer.write(encode_message(dict(msg, id=1)))
+    await writer.drain()
+
+    reply = await read_message(reader)
+    writer.close()
+    return reply
+
+async def test_images_and_pages(make_deck, path):
+    deck = await serve(make_deck, path)
+    device = deck._deck
+
+    client = IPCClient(path)
+    await client.connect()
+
+    red = solid_image(device, 'red')
+    await client.set_images([(3, Key.UP, red)])
+    assert device.images[3] == red
+
+    await client.change_page('other')
+    assert deck.page is deck._pages['other']
+
+    await client.close()
+    await deck.release()
+
+async def test_unknown_page(make_deck, path):
+    deck = await serve(make_deck, path)
+
+    reply = await raw_request(path, {'op': 'page', 'name': 'nope'})
+    assert 'error' in reply
+    assert deck._page_history == ['main']
+    assert deck.page is deck._pages['main']
+
+    reply = await raw_request(path, {'op': 'images', 'page': 'nope', 'shm': 'x', 'images': []})
+    assert 'error' in reply
+
+    with pytest.raises(KeyError):
+        deck.change_page('nope')
+    assert deck._page_history == ['main']
+
+    await deck.release()
+
+async def test_unregistered_shm(make_deck, path):
+    deck = await serve(make_deck, path)
+
+    client = IPCClient(path)
+    await client.connect()
+
+    # somebody else's segment, never registered on this connection
+    other = IPCClient(path)
+    reply = await raw_request(path, {
+        'op': 'images', 'shm': other._shm.name, 'images': [[0, Key.UP, 0, 10]],
+    })
+    assert 'not registered' in reply['error']
+
+    for name in ('../../etc/passwd', 'no/slashes', '', 42):
+        reply = await raw_request(path, {'op': 'shm', 'name': name})
+        assert 'error' in reply
+
+    with pytest.raises(RuntimeError):
+        await client.request('images', shm=client._shm.name, images=[[99, Key.UP, 0, 10]])
+
+    await other.close()
+    await client.close()
+    await deck.release()
+
+async def test_server_gone(path):
+    async def handle(reader, writer):
+        # answer the shm registration, then hang up on the next request
+        msg = await read_message(reader)
+        writer.write(encode_message({'id': msg['id'], 'ok': True}))
+        await writer.drain()
+
+        await read_message(reader)
+        writer.close()
+
+    server = await asyncio.start_unix_server(handle, path=path)
+
+    client = IPCClient(path)
+    await client.connect()
+
+    with pytest.raises(ConnectionError):
+        await asyncio.wait_for(client.set_brightness(.5), 2)
+
+    # events() ends instead of waiting forever
+    events = await asyncio.wait_for(_collect(client.events()), 2)
+    assert events == []
+
+    with pytest.raises(ConnectionError):
+        await client.change_page('main')
+
+    await client.close()
+    server.close()
+    await server.wait_closed()
+
+async def test_events_end_with_deck(make_deck, path):
+    deck = await serve(make_deck, path)
+
+    client = IPCClient(path)
+    await client.connect()
+    await client.subscribe()
+
+    deck._deck.press(2, True)
+    events = client.events()
+    event = await asyncio.wait_for(events.__anext__(), 2)
+    assert event['event'] == 'key_down' and event['key'] == 2
+
+    await deck.release()
+
+    rest = await asyncio.wait_for(_collect(events), 2)
+    assert rest == []
+
+    await client.close()
+
+async def _collect(events):
+    return [event async for event in events]
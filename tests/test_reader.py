@@ -0,0 +1,164 @@
+import time
+import queue
+import ctypes
+import socket
+import asyncio
+
+import pytest
+
+from streamdeckui import Page, Key
+from streamdeckui.fake import FakeDevice
+
+class RecordingKey(Key):
+    def __init__(self, page, events, **kw):
+        super().__init__(page, **kw)
+        self.events = events
+
+    async def cb_key_down(self, *args, **kw):
+        self.events.append(('down', self.index))
+
+    async def cb_key_up(self, *args, **kw):
+        self.events.append(('up', self.index))
+
+
+class ReaderDevice(FakeDevice):
+    """
+    FakeDevice with the library's reader thread hooks, records hand overs
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.readers = []
+
+    def _setup_reader(self, callback):
+        self.readers.append(callback)
+
+    def _read(self):
+        pass
+
+
+class FakeHIDAPI:
+    """
+    quacks like the ctypes hidapi library behind the libusb transport
+    """
+
+    def __init__(self):
+        self.reports = reports = queue.Queue()
+
+        # NOTE a plain function, the reader sets ctypes argtypes on it
+        def hid_read_timeout(handle, buf, length, timeout):
+            try:
+                report = reports.get(timeout=timeout / 1000)
+            except queue.Empty:
+                return 0
+
+            ctypes.memmove(buf, report, len(report))
+            return len(report)
+
+        self.hid_read_timeout = hid_read_timeout
+
+
+class FakeTransport:
+    def __init__(self):
+        self.device_handle = 1
+        self.hidapi = type('Library', (), {})()
+        self.hidapi.hidapi = FakeHIDAPI()
+
+
+async def setup(make_deck, device=None):
+    deck = make_deck(device or ReaderDevice())
+
+    events = []
+    page = Page(deck, [])
+    page._keys = [RecordingKey(page, events) for _ in range(deck._deck.key_count())]
+
+    deck.add_page('main', page)
+    deck.change_page('main')
+    await asyncio.sleep(0)
+
+    return deck, events
+
+async def settle(events, count, timeout=2):
+    deadline = time.monotonic() + timeout
+    while len(events) < count and time.monotonic() < deadline:
+        await asyncio.sleep(.01)
+
+def states(*pressed):
+    return [k in pressed for k in range(FakeDevice.KEY_COUNT)]
+
+@pytest.mark.parametrize('mode', ['loop', 'thread'])
+async def test_socketpair(make_deck, mode):
+    deck, events = await setup(make_deck)
+    ours, theirs = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+
+    reader = deck.start_input(mode, ours.fileno())
+
+    # NOTE both presses arrive before the loop gets a look in
+    theirs.send(FakeDevice.key_report(states(3)))
+    theirs.send(FakeDevice.key_report(states(3, 7)))
+    await settle(events, 2)
+
+    theirs.send(FakeDevice.key_report(states()))
+    await settle(events, 4)
+
+    assert events == [('down', 3), ('down', 7), ('up', 3), ('up', 7)]
+    assert reader.reports == 3
+
+    await deck.release()
+    ours.close()
+    theirs.close()
+
+async def test_transport(make_deck):
+    device = ReaderDevice()
+    device.device = FakeTransport()
+    hidapi = device.device.hidapi.hidapi
+
+    deck, events = await setup(make_deck, device)
+    deck.start_input()
+
+    hidapi.reports.put(FakeDevice.key_report(states(1)))
+    hidapi.reports.put(FakeDevice.key_report(states()))
+    await settle(events, 2)
+
+    assert events == [('down', 1), ('up', 1)]
+
+    await deck.release()
+
+async def test_transport_needs_hidapi(make_deck):
+    deck, _ = await setup(make_deck)
+
+    with pytest.raises(OSError):
+        deck.start_input()
+
+    with pytest.raises(ValueError):
+        deck.start_input('transport', 0)
+
+    await deck.release()
+
+async def test_stop_hands_reading_back(make_deck):
+    deck, _ = await setup(make_deck)
+    device = deck._deck
+    ours, theirs = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+
+    reader = deck.start_input('thread', ours.fileno())
+    reader.stop()
+
+    assert device.readers == [None, device._read]
+
+    await deck.release()
+    ours.close()
+    theirs.close()
+
+async def test_release_does_not_restart_library_reader(make_deck):
+    deck, _ = await setup(make_deck)
+    device = deck._deck
+    ours, theirs = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+
+    deck.start_input('loop', ours.fileno())
+    await deck.release()
+
+    assert device.readers == [None]
+    assert not device.is_open
+
+    ours.close()
+    theirs.close()
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+
+import pytest
+
+from streamdeckui import Page, Key
+from streamdeckui.clock import VirtualClock
+from streamdeckui.tasks import TaskGroup
+
+class PausePage(Page):
+    task_policy = TaskGroup.PAUSE
+
+class KeepPage(Page):
+    task_policy = TaskGroup.KEEP
+
+
+async def setup(make_deck, page_class=Page):
+    clock = VirtualClock(asyncio.get_running_loop())
+    deck = make_deck(clock=clock, dim_time=3600, off_time=3600)
+
+    deck.add_page('main', page_class(deck, None))
+    deck.add_page('other', Page(deck, None))
+    deck.change_page('main')
+    await clock.run_for(0)
+
+    return deck, clock, deck._pages['main']
+
+def animate(key, clock, ticks):
+    """
+    what a Key.spawn()ed animation looks like, flip the image every second
+    """
+    async def run():
+        while True:
+            await key.page.tasks.checkpoint()
+            ticks.append(clock.time())
+            key.show_image(len(ticks) % 2)
+            await clock.sleep(1)
+
+    return key.spawn(run())
+
+async def test_cancel(make_deck):
+    deck, clock, page = await setup(make_deck)
+    ticks = []
+
+    task = animate(page.keys[0], clock, ticks)
+    await clock.run_for(2.5)
+    assert len(page.tasks) == 1
+
+    deck.change_page('other')
+    await clock.run_for(5)
+
+    assert task.cancelled()
+    assert len(page.tasks) == 0
+    assert len(ticks) == 3
+
+    await deck.release()
+
+async def test_pause(make_deck):
+    deck, clock, page = await setup(make_deck, PausePage)
+    device = deck._deck
+    ticks = []
+
+    task = animate(page.keys[0], clock, ticks)
+    await clock.run_for(2.5)
+    assert len(ticks) == 3
+
+    deck.change_page('other')
+    await clock.run_for(0)
+    assert page.tasks.paused
+    writes = device.key_writes
+
+    await clock.run_for(10)
+
+    # stuck in checkpoint(), not cancelled
+    assert not task.done()
+    assert len(ticks) == 3  # woke up from its sleep, stopped at the checkpoint
+    assert device.key_writes == writes
+
+    deck.change_page('main')
+    await clock.run_for(2)
+    assert not page.tasks.paused
+    assert len(ticks) > 3
+
+    task.cancel()
+    await deck.release()
+
+async def test_keep_never_writes_in_background(make_deck):
+    deck, clock, page = await setup(make_deck, KeepPage)
+    device = deck._deck
+    ticks = []
+
+    task = animate(page.keys[0], clock, ticks)
+    await clock.run_for(.5)
+
+    deck.change_page('other')
+    await clock.run_for(0)
+    writes = device.key_writes
+
+    await clock.run_for(10)
+
+    # still running, but nothing it showed reached the device
+    assert len(ticks) == 11
+    assert device.key_writes == writes
+
+    task.cancel()
+    await deck.release()
+
+async def test_hidden_show_image(make_deck):
+    deck, clock, page = await setup(make_deck)
+    device = deck._deck
+
+    deck.change_page('other')
+    await clock.run_for(0)
+    writes = device.key_writes
+
+    for key in page.keys:
+        key.show_image(Key.DOWN)
+        key.state = Key.DOWN
+
+    assert device.key_writes == writes
+
+    # coming back repaints, with the state the keys are in now
+    deck.change_page('main')
+    await clock.run_for(0)
+
+    assert device.key_writes == writes + device.key_count()
+    assert device.images[0] == page.keys[0].image(Key.DOWN)
+
+    await deck.release()
+
+async def test_failed_task_logged(make_deck, caplog):
+    deck, clock, page = await setup(make_deck)
+
+    async def fail():
+        raise RuntimeError("oops")
+
+    with caplog.at_level(logging.ERROR, 'streamdeckui.tasks'):
+        page.keys[0].spawn(fail())
+        await clock.run_for(0)
+
+    assert any('failed' in r.getMessage() and r.exc_info for r in caplog.records)
+    assert len(page.tasks) == 0
+
+    await deck.release()
+
+async def test_unknown_policy():
+    with pytest.raises(ValueError):
+        TaskGroup(asyncio.get_running_loop(), 'sometimes')
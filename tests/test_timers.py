@@ -0,0 +1,164 @@
+import asyncio
+
+from streamdeckui import Page, Key
+from streamdeckui.clock import VirtualClock
+from streamdeckui.periodic import Periodic, Alternating
+
+DIM = 30
+OFF = 60
+
+class RecordingKey(Key):
+    def __init__(self, page, events, **kw):
+        super().__init__(page, **kw)
+        self.events = events
+
+    async def cb_key_down(self, *args, **kw):
+        await super().cb_key_down(*args, **kw)
+        self.events.append(('down', self.index))
+
+    async def cb_key_up(self, *args, **kw):
+        await super().cb_key_up(*args, **kw)
+        self.events.append(('up', self.index))
+
+
+async def setup(make_deck):
+    clock = VirtualClock(asyncio.get_running_loop())
+    deck = make_deck(clock=clock, dim_time=DIM, off_time=OFF)
+
+    events = []
+    page = Page(deck, [])
+    page._keys = [RecordingKey(page, events) for _ in range(deck._deck.key_count())]
+
+    deck.add_page('main', page)
+    deck.change_page('main')
+    deck.turn_on()
+    await clock.run_for(0)
+
+    return deck, clock, events
+
+async def press(deck, clock, key, hold=.1):
+    deck._deck.press(key, True)
+    await clock.run_for(hold)
+    deck._deck.press(key, False)
+    await clock.run_for(.01)
+
+async def test_dim_then_off(make_deck):
+    deck, clock, _ = await setup(make_deck)
+    device = deck._deck
+
+    await clock.run_for(DIM - 1)
+    assert device.brightness == deck.brightness
+
+    await clock.run_for(1)
+    assert device.brightness == deck.brightness / 2
+
+    await clock.run_for(OFF - 1)
+    assert device.brightness == deck.brightness / 2
+
+    await clock.run_for(1)
+    assert device.brightness == 0
+
+    # and stays off
+    await clock.run_for(3600)
+    assert device.brightness == 0
+
+    await deck.release()
+
+async def test_press_resets_dim(make_deck):
+    deck, clock, events = await setup(make_deck)
+    device = deck._deck
+
+    await clock.run_for(DIM - 5)
+    await press(deck, clock, 0)
+
+    await clock.run_for(DIM - 1)
+    assert device.brightness == deck.brightness
+    assert events == [('down', 0), ('up', 0)]
+
+    await clock.run_for(1)
+    assert device.brightness == deck.brightness / 2
+
+    # keys still work while dimmed, and turn the screen back up
+    await press(deck, clock, 1)
+    assert device.brightness == deck.brightness
+    assert events[-2:] == [('down', 1), ('up', 1)]
+
+    await deck.release()
+
+async def test_wake_press_is_swallowed(make_deck):
+    deck, clock, events = await setup(make_deck)
+    device = deck._deck
+
+    await clock.run_for(DIM + OFF)
+    assert device.brightness == 0
+
+    device.press(4, True)
+    await clock.run_for(.1)
+
+    # the screen comes on with the press, the page never hears about it
+    assert device.brightness == deck.brightness
+    assert events == []
+
+    device.press(4, False)
+    await clock.run_for(.01)
+    assert events == []
+
+    # normal callbacks are back after the release
+    await press(deck, clock, 4)
+    assert events == [('down', 4), ('up', 4)]
+
+    # and the timers start over
+    await clock.run_for(DIM)
+    assert device.brightness == deck.brightness / 2
+
+    await deck.release()
+
+async def test_periodic_ticks():
+    clock = VirtualClock(asyncio.get_running_loop())
+    ticks = []
+
+    async def tick():
+        ticks.append(clock.time())
+
+    periodic = Periodic(clock, 2, tick)
+    periodic.start()
+
+    await clock.run_for(20.5)
+    assert ticks == [2 * i for i in range(1, 11)]
+
+    await periodic.stop()
+    await clock.run_for(10)
+    assert len(ticks) == 10
+
+async def test_periodic_sync_func():
+    clock = VirtualClock(asyncio.get_running_loop())
+    ticks = []
+
+    periodic = Periodic(clock, .5, ticks.append, 'tick')
+    periodic.start()
+
+    await clock.run_for(60)
+    assert len(ticks) == 120
+
+    await periodic.stop()
+
+async def test_alternating():
+    clock = VirtualClock(asyncio.get_running_loop())
+    calls = []
+
+    async def a():
+        calls.append('a')
+
+    async def b():
+        calls.append('b')
+
+    async def c():
+        calls.append('c')
+
+    alternating = Alternating(clock, 1, [a, b, c])
+    alternating.start()
+
+    await clock.run_for(7)
+    assert calls == ['a', 'b', 'c', 'a', 'b', 'c', 'a']
+
+    await alternating.stop()
@@ -0,0 +1,159 @@
+import asyncio
+
+from PIL import ImageDraw
+
+from streamdeckui import Page
+from streamdeckui.fake import FakePlusDevice
+from streamdeckui.touch import Dial, TouchRegion, TouchscreenEventType
+
+class RecordingDial(Dial):
+    __slots__ = ('events',)
+
+    def __init__(self, page, events):
+        super().__init__(page)
+        self.events = events
+
+    async def cb_dial_turn(self, amount):
+        self.events.append((self.index, 'turn', amount))
+
+    async def cb_dial_push(self, pressed):
+        await super().cb_dial_push(pressed)
+        self.events.append((self.index, 'push', pressed))
+
+
+class RecordingRegion(TouchRegion):
+    def __init__(self, page, events, *rect, **kw):
+        super().__init__(page, *rect, **kw)
+        self.events = events
+
+    async def cb_touch(self, event, x, y, **kw):
+        self.events.append((self.rect[0], event, x, y, kw))
+
+
+async def setup(make_deck):
+    deck = make_deck(FakePlusDevice())
+    device = deck._deck
+    events = []
+
+    page = Page(deck, None)
+    page._dials = [RecordingDial(page, events) for _ in range(device.dial_count())]
+    left = page.add_region(RecordingRegion(page, events, 0, 0, 200, 100))
+    right = page.add_region(RecordingRegion(page, events, 400, 0, 200, 100, background='navy'))
+
+    deck.add_page('main', page)
+    deck.change_page('main')
+    await asyncio.sleep(0)
+
+    return deck, device, page, events, (left, right)
+
+async def settle(deck):
+    """
+    wait for every callback dispatched so far to finish
+    """
+    for fut in list(deck._futures):
+        results = await asyncio.wrap_future(fut)
+        await asyncio.gather(*(task for _, task in results))
+
+async def test_first_update_sends_region(make_deck):
+    deck, device, page, _, (left, right) = await setup(make_deck)
+
+    # NOTE showing the page painted both regions whole
+    assert device.touch_rects == [(0, 0, 200, 100), (400, 0, 200, 100)]
+
+    await deck.release()
+
+async def test_only_damage_sent(make_deck):
+    deck, device, page, _, (left, right) = await setup(make_deck)
+    device.touch_rects.clear()
+
+    draw = ImageDraw.Draw(right.layer('dot'))
+    draw.rectangle((10, 20, 29, 39), fill='white')
+    right.update()
+
+    assert device.touch_rects == [(410, 20, 20, 20)]
+
+    # nothing changed, nothing sent
+    right.update()
+    left.update()
+    assert device.touch_rects == [(410, 20, 20, 20)]
+
+    # grows to cover both the old and new dot
+    draw = ImageDraw.Draw(right.layer('dot', clear=True))
+    draw.rectangle((50, 20, 59, 29), fill='white')
+    right.update()
+
+    assert device.touch_rects[-1] == (410, 20, 50, 20)
+
+    right.remove_layer('dot')
+    right.update()
+
+    assert device.touch_rects[-1] == (450, 20, 10, 10)
+    assert len(device.touch_rects) == 3
+
+    await deck.release()
+
+async def test_hidden_page_not_sent(make_deck):
+    deck, device, page, events, (left, right) = await setup(make_deck)
+
+    deck.add_page('other', Page(deck, None))
+    deck.change_page('other')
+    await asyncio.sleep(0)
+    device.touch_rects.clear()
+
+    left.set_layer('text', left.frame().point(lambda v: 255 - v))
+    left.update()
+    assert device.touch_rects == []
+
+    # coming back repaints everything
+    deck.change_page('main')
+    await asyncio.sleep(0)
+    assert device.touch_rects == [(0, 0, 200, 100), (400, 0, 200, 100)]
+
+    await deck.release()
+
+async def test_dial_routing(make_deck):
+    deck, device, page, events, _ = await setup(make_deck)
+
+    device.turn(2, -3)
+    device.push(1)
+    device.push(1)  # no change, not dispatched
+    device.push(1, False)
+    await settle(deck)
+
+    assert events == [(2, 'turn', -3), (1, 'push', True), (1, 'push', False)]
+    assert not page.dials[1].pressed
+
+    await deck.release()
+
+async def test_touch_routing(make_deck):
+    deck, device, page, events, _ = await setup(make_deck)
+
+    device.touch(450, 30)
+    device.touch(300, 30)  # between the regions
+    device.touch(10, 90, x_out=420, y_out=50)
+    await settle(deck)
+
+    assert events == [
+        (400, TouchscreenEventType.SHORT, 50, 30, {}),
+        (0, TouchscreenEventType.DRAG, 10, 90, {'x_out': 420, 'y_out': 50}),
+    ]
+
+    await deck.release()
+
+async def test_touch_goes_to_current_page(make_deck):
+    deck, device, page, events, _ = await setup(make_deck)
+
+    other_events = []
+    other = Page(deck, None)
+    other.add_region(RecordingRegion(other, other_events, 0, 0, 800, 100))
+    deck.add_page('other', other)
+    deck.change_page('other')
+    await asyncio.sleep(0)
+
+    device.touch(450, 30)
+    await settle(deck)
+
+    assert events == []
+    assert other_events == [(0, TouchscreenEventType.SHORT, 450, 30, {})]
+
+    await deck.release()
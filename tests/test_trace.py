@@ -0,0 +1,89 @@
+import time
+import asyncio
+
+from streamdeckui import Page
+from streamdeckui.fake import FakeDevice
+from streamdeckui.clock import VirtualClock
+from streamdeckui.trace import TraceRecorder, read_trace, replay
+
+class SlowDevice(FakeDevice):
+    def set_key_image(self, key, image):
+        time.sleep(.01)
+        super().set_key_image(key, image)
+
+
+def make_trace(path, presses):
+    clock = VirtualClock()
+    recorder = TraceRecorder(path, clock, FakeDevice.KEY_COUNT)
+
+    for key in presses:
+        recorder.record(key, True)
+        clock.advance(.001)
+        recorder.record(key, False)
+        clock.advance(.001)
+
+    recorder.close()
+    return str(path)
+
+async def setup(make_deck, device=None):
+    deck = make_deck(device, dim_time=3600, off_time=3600)
+    deck.add_page('main', Page(deck, None))
+    deck.change_page('main')
+    await asyncio.sleep(0)
+
+    return deck
+
+async def test_read_trace(tmp_path):
+    path = make_trace(tmp_path / 'keys.trace', [3, 4])
+    key_count, events = read_trace(path)
+
+    assert key_count == FakeDevice.KEY_COUNT
+    assert [(key, pressed) for _, key, pressed in events] == [(3, True), (3, False), (4, True), (4, False)]
+    assert abs(events[-1][0] - .003) < 1e-6
+
+async def test_every_event_rendered(make_deck, tmp_path):
+    path = make_trace(tmp_path / 'keys.trace', range(10))
+    deck = await setup(make_deck)
+    device = deck._deck
+
+    stats = await replay(deck, path, speed=None, budget=1)
+
+    assert stats.events == 20
+    assert stats.writes == stats.rendered == 20
+    assert len(stats.frame_latencies) == 20
+    assert stats.unrendered == stats.late == stats.dropped == 0
+    assert stats.backlog >= 1
+
+    # the write is ours again
+    assert 'set_key_image' not in vars(device)
+
+    await deck.release()
+
+async def test_slow_writes_are_late(make_deck, tmp_path):
+    path = make_trace(tmp_path / 'keys.trace', [0, 1, 2])
+    deck = await setup(make_deck, SlowDevice())
+
+    stats = await replay(deck, path, speed=None, budget=.005)
+
+    assert stats.rendered == 6
+    assert stats.late == 6
+    assert min(stats.frame_latencies) >= .01
+
+    await deck.release()
+
+async def test_dispatched_but_not_rendered(make_deck, tmp_path):
+    path = make_trace(tmp_path / 'keys.trace', [5, 6])
+    deck = await setup(make_deck)
+
+    for key in deck.page.keys:
+        key.connect(False, False)
+
+    stats = await replay(deck, path, speed=None, budget=1)
+
+    # dispatch finished quickly, but nothing ever reached the screen
+    assert stats.dispatched == 4
+    assert stats.slow_dispatch == 0
+    assert stats.writes == stats.rendered == 0
+    assert stats.unrendered == stats.late == 4
+
+    await deck.release()
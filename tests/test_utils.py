@@ -0,0 +1,60 @@
+import io
+
+from PIL import Image
+
+from streamdeckui import Page
+from streamdeckui.fake import FakeDevice
+from streamdeckui.bundle import compile_bundle, load_bundle
+from streamdeckui.utils import ASSET_PATH
+from streamdeckui.utils import render_key_image, add_text, solid_image, from_native
+
+def test_native_images_pass_through():
+    device = FakeDevice()
+    image = solid_image(device)
+
+    assert render_key_image(device, image) is image
+    assert render_key_image(device, memoryview(image)) is not None
+
+def test_add_text_to_native_image():
+    device = FakeDevice()
+    image = add_text(device, render_key_image(device, ASSET_PATH / 'pressed.png'), 'hello')
+
+    image = Image.open(io.BytesIO(bytes(image)))
+    assert image.size == (device.KEY_PIXEL_WIDTH, device.KEY_PIXEL_HEIGHT)
+
+def test_from_native_undoes_flip():
+    device = FakeDevice()
+    image = from_native(device, solid_image(device, 'red'))
+
+    assert isinstance(image, Image.Image)
+    assert image.size == (device.KEY_PIXEL_WIDTH, device.KEY_PIXEL_HEIGHT)
+
+async def test_labelled_key(make_deck):
+    deck = make_deck()
+    page = Page(deck, None)
+    before = page.keys[0].image_id(0)
+
+    page.keys[0].add_label(0, 'label')
+    assert page.keys[0].image_id(0) != before
+
+    await deck.release()
+
+async def test_bundle_with_labels(make_deck, tmp_path):
+    spec = tmp_path / 'deck.json'
+    spec.write_text('''{
+        "pages": {
+            "main": {"keys": {"0": {"label": "Lights", "link": "other"}}},
+            "other": {"keys": {"0": {"label": "Back", "color": "darkblue", "link": "back"}}}
+        }
+    }''')
+
+    device = FakeDevice()
+    compile_bundle(spec, tmp_path / 'out', device)
+
+    deck = make_deck(device)
+    pages = load_bundle(deck, tmp_path / 'out')
+
+    assert set(pages) == {'main', 'other'}
+    assert deck.page is pages['main']
+
+    await deck.release()
@@ -0,0 +1,62 @@
+import asyncio
+
+from streamdeckui import VirtualPage, Key
+from streamdeckui.utils import ASSET_PATH, solid_image
+
+async def test_construct_and_scroll(make_deck):
+    deck = make_deck()
+    items = list(range(100))
+
+    page = VirtualPage(deck, items, lambda i: (ASSET_PATH / 'pressed.png', str(i)), prefetch=0)
+    deck.add_page('v', page)
+    deck.change_page('v')
+    await asyncio.sleep(0)
+
+    assert [key.item for key in page.slots] == list(range(13))
+
+    page.scroll(page.step)
+    assert [key.item for key in page.slots] == list(range(5, 18))
+
+    # the window scrolled by one row, the other items stay cached
+    assert set(page._cache) == set(range(5, 18))
+
+    await deck.release()
+
+async def test_native_and_labelled_renderers(make_deck):
+    deck = make_deck()
+    red, blue = solid_image(deck, 'red'), solid_image(deck, 'blue')
+
+    def renderer(item):
+        if item % 2:
+            return red
+        return blue, f"#{item}"
+
+    page = VirtualPage(deck, list(range(20)), renderer, prefetch=0)
+
+    # every odd item shares one image
+    odd = {page.slots[i].image_id(Key.UP) for i in range(1, 13, 2)}
+    even = {page.slots[i].image_id(Key.UP) for i in range(0, 13, 2)}
+
+    assert len(odd) == 1
+    assert len(even) == 7
+
+    await deck.release()
+
+async def test_select(make_deck):
+    deck = make_deck()
+    selected = []
+
+    async def on_select(item):
+        selected.append(item)
+
+    page = VirtualPage(deck, ['a', 'b', 'c'], lambda item: None, on_select=on_select)
+    deck.add_page('v', page)
+    deck.change_page('v')
+    await asyncio.sleep(0)
+
+    await page.slots[1].cb_key_up()
+    await page.slots[5].cb_key_up()  # empty slot
+
+    assert selected == ['b']
+
+    await deck.release()
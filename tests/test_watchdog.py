@@ -0,0 +1,138 @@
+import sys
+import time
+import asyncio
+import logging
+import weakref
+
+from streamdeckui import Page, Key
+from streamdeckui.periodic import Periodic
+from streamdeckui.watchdog import Watchdog, culprit
+
+THRESHOLD = .05
+
+class BlockingKey(Key):
+    async def cb_key_down(self, *args, **kw):
+        time.sleep(THRESHOLD * 6)
+
+
+def blocking():
+    time.sleep(THRESHOLD * 6)
+
+def stall_logs(caplog):
+    return [r.getMessage() for r in caplog.records if 'event loop blocked' in r.getMessage()]
+
+async def test_stall_detected():
+    watchdog = Watchdog(asyncio.get_running_loop(), THRESHOLD)
+    watchdog.start()
+    await asyncio.sleep(THRESHOLD)
+
+    time.sleep(THRESHOLD * 4)
+    await asyncio.sleep(THRESHOLD)
+
+    # under threshold
+    time.sleep(THRESHOLD / 4)
+    await asyncio.sleep(THRESHOLD)
+
+    watchdog.stop()
+    stats = watchdog.stats()
+
+    # NOTE the stall is measured up to the next heartbeat, leave room for a busy machine
+    assert stats['stalls'] == 1
+    assert THRESHOLD * 3 <= stats['longest'] <= THRESHOLD * 10
+    assert sum(stats['histogram'].values()) == 1
+
+async def test_restart_isnt_a_stall():
+    watchdog = Watchdog(asyncio.get_running_loop(), THRESHOLD)
+    watchdog.start()
+    await asyncio.sleep(THRESHOLD)
+    watchdog.stop()
+
+    time.sleep(THRESHOLD * 4)
+
+    watchdog.start()
+    await asyncio.sleep(THRESHOLD * 2)
+    watchdog.stop()
+
+    assert watchdog.stalls == 0
+
+async def test_histogram_and_rate_limit(caplog):
+    watchdog = Watchdog(asyncio.get_running_loop(), THRESHOLD, log_interval=3600)
+
+    with caplog.at_level(logging.WARNING, 'streamdeckui.watchdog'):
+        for stalled in (.05, .1, .3, 2.5, 20):
+            watchdog._sample = ('Key<0>.cb_key_down', [])
+            watchdog._record(stalled)
+
+    stats = watchdog.stats()
+    assert stats['stalls'] == 5
+    assert stats['longest'] == 20
+
+    # bucket bounds are inclusive, anything past the last is under None
+    histogram = stats['histogram']
+    assert histogram[.1] == 2
+    assert histogram[.5] == 1
+    assert histogram[2.5] == 1
+    assert histogram[None] == 1
+    assert sum(histogram.values()) == 5
+
+    # only the first is logged within log_interval
+    assert len(stall_logs(caplog)) == 1
+    assert watchdog.suppressed == 4
+
+    # the next one logged says how many were skipped, and starts counting again
+    watchdog._last_log = None
+    with caplog.at_level(logging.WARNING, 'streamdeckui.watchdog'):
+        watchdog._sample = ('Key<0>.cb_key_down', [])
+        watchdog._record(.3)
+
+    assert '(4 similar suppressed)' in stall_logs(caplog)[-1]
+    assert watchdog.suppressed == 0
+
+async def test_blames_key_callback(make_deck, caplog):
+    deck = make_deck(watchdog=THRESHOLD)
+
+    page = Page(deck, [])
+    page._keys = [BlockingKey(page) for _ in range(deck._deck.key_count())]
+    deck.add_page('main', page)
+    deck.change_page('main')
+    await asyncio.sleep(THRESHOLD * 2)
+
+    with caplog.at_level(logging.WARNING, 'streamdeckui.watchdog'):
+        deck._deck.press(3, True)
+        await asyncio.sleep(THRESHOLD * 10)
+
+    assert any('in Key<3>.cb_key_down' in msg for msg in stall_logs(caplog))
+
+    await deck.release()
+
+async def test_blames_periodic(caplog):
+    loop = asyncio.get_running_loop()
+    watchdog = Watchdog(loop, THRESHOLD)
+    periodic = Periodic(loop, THRESHOLD, blocking)
+
+    with caplog.at_level(logging.WARNING, 'streamdeckui.watchdog'):
+        watchdog.start()
+        periodic.start()
+        await asyncio.sleep(THRESHOLD * 10)
+        await periodic.stop()
+        watchdog.stop()
+
+    assert any('in Periodic(blocking)' in msg for msg in stall_logs(caplog))
+
+async def test_culprit_with_dead_page(make_deck):
+    deck = make_deck()
+    page = Page(deck, None)
+    key = page.keys[0]
+
+    class Gone:
+        pass
+
+    # NOTE str(key) needs the page to look up its index
+    key._page = weakref.ref(Gone())
+
+    def method(self):
+        return sys._getframe()
+
+    assert culprit(method(key)) == 'Key.method'
+
+    await deck.release()
@@ -0,0 +1,78 @@
+import random
+import asyncio
+
+from streamdeckui.clock import VirtualClock
+from streamdeckui.wheel import TimerWheel
+
+RESOLUTION = .01
+EPSILON = 1e-6
+
+async def test_timers_never_fire_early():
+    clock = VirtualClock(asyncio.get_running_loop())
+    wheel = TimerWheel(clock, RESOLUTION)
+    rng = random.Random(1)
+
+    fired = []
+
+    def cb(due):
+        fired.append((due, clock.time()))
+
+    # schedule from arbitrary points in time, not just on tick boundaries
+    for _ in range(3000):
+        delay = rng.choice([rng.uniform(0, .05), rng.uniform(0, 2), rng.uniform(0, 60)])
+        wheel.call_later(delay, cb, clock.time() + delay)
+        clock.advance(rng.uniform(0, .013))
+
+    clock.advance(120)
+
+    assert len(fired) == 3000
+    assert len(wheel) == 0
+
+    for due, when in fired:
+        assert when >= due - EPSILON
+        assert when <= due + RESOLUTION + EPSILON
+
+async def test_cancel():
+    clock = VirtualClock(asyncio.get_running_loop())
+    wheel = TimerWheel(clock, RESOLUTION)
+    fired = []
+
+    timer = wheel.call_later(.5, fired.append, 'a')
+    wheel.call_later(.5, fired.append, 'b')
+    timer.cancel()
+    timer.cancel()
+
+    assert len(wheel) == 1
+
+    clock.advance(1)
+    assert fired == ['b']
+
+async def test_idle_restart():
+    clock = VirtualClock(asyncio.get_running_loop())
+    wheel = TimerWheel(clock, RESOLUTION)
+    fired = []
+
+    wheel.call_later(.1, lambda: fired.append(clock.time()))
+    clock.advance(1)
+
+    # the wheel stopped ticking while idle, time moved on without it
+    clock.advance(100.005)
+    wheel.call_later(.1, lambda: fired.append(clock.time()))
+    clock.advance(1)
+
+    assert fired[0] >= .1
+    assert 101.105 <= fired[1] + EPSILON <= 101.105 + RESOLUTION + 2 * EPSILON
+
+async def test_long_delay_cascades():
+    clock = VirtualClock(asyncio.get_running_loop())
+    wheel = TimerWheel(clock, RESOLUTION)
+    fired = []
+
+    # beyond level 0 and 1 (64 and 4096 ticks)
+    for delay in (1, 50, 3600):
+        wheel.call_later(delay, lambda d=delay: fired.append((d, clock.time())))
+
+    clock.advance(4000)
+
+    for delay, when in fired:
+        assert delay - EPSILON <= when <= delay + RESOLUTION + EPSILON